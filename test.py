@@ -1,5 +1,24 @@
+import random
+import sys
+from collections import Counter
+from itertools import product
+import tempfile
 import unittest
-from week1 import *
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'week2'))
+sys.path.insert(1, str(Path(__file__).parent / 'week3'))
+from main import *
+from csr import CSRGraph
+from kmers import iter_composition, kmer_spectrum
+from universal import k_universal_string
+from nonbranching_paths import compact, contigs, maximal_nonbranching_paths
+from constants import rna_genetic_code
+from parse_genome import IndexedFasta, iter_coding_regions, load_index, parse_genome
+from peptide_search import AhoCorasick, search_peptides
+import central_dogma
+import sequence
+from translation import find_peptide
 
 class TestFunctions(unittest.TestCase):
     def setUp(self):
@@ -14,6 +33,16 @@ class TestFunctions(unittest.TestCase):
         expected2 = ['CAATC', 'AATCC', 'ATCCA', 'TCCAA', 'CCAAC']
         self.assertEqual(result2, result2)
 
+    def test_kmer_spectrum_matches_composition(self):
+        rng = random.Random(0)
+        text = ''.join(rng.choice('ACGT') for _ in range(500))
+        for k in (1, 3, 12, 32, 33):
+            with self.subTest(k=k):
+                composition = kmer_composition(text, k)
+                self.assertEqual(list(iter_composition(text, k)), composition)
+                self.assertEqual(kmer_spectrum(text, k), sorted(Counter(composition).items()))
+        self.assertEqual(kmer_spectrum('ACGNACG', 3), [('ACG', 2)])
+
     def test_reconstruct_genome_from_path_func(self):
         genome_path = ['ACCGA', 'CCGAA', 'CGAAG', 'GAAGC', 'AAGCT']
         result = reconstruct_genome_from_path(genome_path)
@@ -22,10 +51,277 @@ class TestFunctions(unittest.TestCase):
 
 class TestDBGClass(unittest.TestCase):
     def setUp(self):
-        self.g = DBG('AAGATTCTCTAAGA', 4)
+        self.g = DeBruijinGraph(['AAGATTCTCTAAGA'], 4)
 
     def test_dbg_initialization(self):
-        self.assertIsInstance(self.g, DBG)
+        self.assertIsInstance(self.g, DeBruijinGraph)
+
+class TestUniversalString(unittest.TestCase):
+    def graph_universal_string(self, alphabet, k):
+        """Spell an Eulerian path through the de Bruijn graph of every k-mer (linear string)."""
+        kmers = [''.join(kmer) for kmer in product(alphabet, repeat=k)]
+        return reconstruct_genome_from_path(DeBruijinGraph(kmers, k).eulerian_path())
+
+    def test_every_kmer_once(self):
+        for alphabet in ('a', '01', 'xyz', 'ACGT'):
+            for k in range(1, 5):
+                with self.subTest(alphabet=alphabet, k=k):
+                    expected = sorted(''.join(kmer) for kmer in product(alphabet, repeat=k))
+                    circular = k_universal_string(k, alphabet)
+                    wrapped = circular * (k // len(circular) + 2)
+                    self.assertEqual(sorted(wrapped[i:i+k] for i in range(len(circular))), expected)
+                    linear = k_universal_string(k, alphabet, circular=False)
+                    self.assertEqual(sorted(linear[i:i+k] for i in range(len(linear)-k+1)), expected)
+                    if k > 1:
+                        graph = self.graph_universal_string(alphabet, k)
+                        self.assertEqual(len(linear), len(graph))
+                        self.assertEqual(len(circular), len(graph) - (k - 1))
+                        self.assertEqual(sorted(graph[i:i+k] for i in range(len(graph)-k+1)), expected)
+
+    def test_find_k_universal_string(self):
+        for k in range(2, 6):
+            result = find_k_universal_string(k)
+            self.assertEqual(len(result), 2**k)
+            self.assertEqual(len({(result * 2)[i:i+k] for i in range(2**k)}), 2**k)
+
+class TestNonbranchingPaths(unittest.TestCase):
+    def setUp(self):
+        # two isolated cycles whose edges interleave in the CSR edge order
+        self.g = DeBruijinGraph(['ACG', 'TGT', 'GTG', 'CGA', 'GAC'], 3)
+
+    def test_interleaved_cycles(self):
+        paths = maximal_nonbranching_paths(self.g)
+        self.assertEqual(sorted(sorted(set(path)) for path in paths), [['AC', 'CG', 'GA'], ['GT', 'TG']])
+        for path in paths:
+            self.assertEqual(path[0], path[-1])
+
+    def test_cycles_compact(self):
+        self.assertEqual(sorted(map(len, contigs(self.g))), [4, 5])
+        self.assertEqual(compact(self.g).edge_count(), 2)
+
+class TestCSRGraph(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.genome = ''.join(rng.choice('ACGT') for _ in range(300))
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / 'graph.csr'
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_save_load_round_trip(self):
+        # labels of k-1 <= 32 bases pack into 64 bits, wider ones are stored as strings
+        for k in (20, 33, 34, 40):
+            for encoded in (False, True):
+                dbg = DeBruijinGraph([self.genome], k, encoded=encoded)
+                for graph in (dbg.csr(), compact(dbg)):
+                    with self.subTest(k=k, encoded=encoded, compacted=graph.edge_labels is not None):
+                        graph.save(self.path)
+                        loaded = CSRGraph.load(self.path)
+                        self.assertEqual(list(loaded.offsets), list(graph.offsets))
+                        self.assertEqual(list(loaded.targets), list(graph.targets))
+                        self.assertEqual(list(map(loaded.label, range(loaded.node_count()))),
+                                         list(map(graph.label, range(graph.node_count()))))
+                        self.assertEqual(loaded.eulerian_genome(), self.genome)
+
+def edge_labels(graph):
+    """Return the multiset of (source, target) label pairs of a graph, whatever its node IDs."""
+    csr = graph.csr()
+    return Counter((csr.label(node), csr.label(csr.targets[edge]))
+                   for node in range(csr.node_count())
+                   for edge in range(csr.offsets[node], csr.offsets[node+1]))
+
+class TestParallelConstruction(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(2)
+        genome = ''.join(rng.choice('ACGT') for _ in range(2000))
+        self.reads = [genome[i:i+100] for i in range(0, 1900, 7)]
+
+    def test_parallel_matches_serial(self):
+        for k in (15, 33, 41):
+            with self.subTest(k=k):
+                serial = DeBruijinGraph(self.reads, k, encoded=True)
+                parallel = DeBruijinGraph(iter(self.reads), k, encoded=True, workers=2)
+                self.assertEqual(edge_labels(parallel), edge_labels(serial))
+
+class TestSequenceKernels(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(6)
+        self.dna = ''.join(rng.choice('ACGTNRYacgtn') for _ in range(1000))
+        self.rna = self.dna.replace('T', 'U').replace('t', 'u')
+
+    def test_str_bytes_bytearray(self):
+        self.assertEqual(sequence.complement('ACGTNRYKM'), 'TGCANYRMK')
+        self.assertEqual(sequence.reverse_complement('AACGTt'), 'aACGTT')
+        self.assertEqual(sequence.complement('ACGU', rna=True), 'UGCA')
+        self.assertEqual(sequence.reverse_complement('ACGU', rna=True), 'ACGU')
+        self.assertEqual(sequence.reverse_complement('AAGCu', rna=True), 'aGCUU')
+        for kind in (str, bytes, bytearray):
+            dna = self.dna if kind is str else kind(self.dna.encode())
+            rna = self.rna if kind is str else kind(self.rna.encode())
+            with self.subTest(kind=kind.__name__):
+                self.assertIsInstance(sequence.complement(dna), kind)
+                self.assertEqual(sequence.reverse_complement(sequence.reverse_complement(dna)), dna)
+                self.assertEqual(sequence.reverse_complement(sequence.reverse_complement(rna, rna=True), rna=True), rna)
+                self.assertEqual(sequence.transcribe(dna), rna)
+                self.assertEqual(sequence.back_transcribe(rna), dna)
+                self.assertEqual(sequence.upper(dna), dna.upper())
+                masked = ''.join('N' if base.islower() else base for base in self.dna)
+                self.assertEqual(sequence.hard_mask(dna), masked if kind is str else kind(masked.encode()))
+
+    def test_inplace_and_chunked(self):
+        for rna, text in ((False, self.dna), (True, self.rna)):
+            with self.subTest(rna=rna):
+                expected = sequence.reverse_complement(text, rna=rna)
+                buffer = bytearray(text.encode())
+                sequence.complement_inplace(buffer, rna=rna, chunk_size=7)
+                self.assertEqual(buffer.decode(), sequence.complement(text, rna=rna))
+                buffer = bytearray(text.encode())
+                sequence.reverse_complement_inplace(buffer, rna=rna, chunk_size=7)
+                self.assertEqual(buffer.decode(), expected)
+                chunks = sequence.iter_reverse_complement(memoryview(text.encode()), rna=rna, chunk_size=7)
+                self.assertEqual(b''.join(chunks).decode(), expected)
+                self.assertEqual(''.join(sequence.iter_reverse_complement(text, rna=rna, chunk_size=64)), expected)
+                self.assertEqual(''.join(sequence.iter_complement([text[:10], text[10:]], rna=rna)),
+                                 sequence.complement(text, rna=rna))
+        buffer = bytearray(self.dna.encode())
+        sequence.transcribe_inplace(buffer, chunk_size=7)
+        self.assertEqual(buffer.decode(), self.rna)
+        self.assertEqual(''.join(sequence.iter_transcribed([self.dna[:3], self.dna[3:]])), self.rna)
+
+def reference_find_coding_region(pattern, peptide, genetic_code):
+    """The original window-by-window scan, translating each window and its reverse complement."""
+    def translate(rna):
+        protein = ''
+        for i in range(0, len(rna), 3):
+            aa = genetic_code[rna[i:i+3]]
+            if aa == '*':
+                break
+            protein += aa
+        return protein
+
+    complement = {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A'}
+    l = len(peptide) * 3
+    regions = []
+    for i in range(len(pattern) - l + 1):
+        window = pattern[i:i+l]
+        rc = ''.join(complement[base] for base in reversed(window))
+        if peptide in (translate(window.replace('T', 'U')), translate(rc.replace('T', 'U'))):
+            regions.append(window)
+    return regions
+
+class TestFindCodingRegion(unittest.TestCase):
+    def setUp(self):
+        self.code = rna_genetic_code()
+
+    def test_example(self):
+        pattern = 'ATGGCCATGGCCCCCAGAACTGAGATCAATAGTACCCGTATTAACGGGTGA'
+        self.assertEqual(central_dogma.find_coding_region(pattern, 'MA'), ['ATGGCC', 'GGCCAT', 'ATGGCC'])
+
+    def test_matches_reference_scan(self):
+        rng = random.Random(7)
+        reverse_hits = 0
+        for _ in range(300):
+            pattern = ''.join(rng.choice('ACGT') for _ in range(rng.randint(0, 300)))
+            l = rng.randint(1, 4)
+            # take peptides from real windows on either strand, so most pairs have hits
+            if len(pattern) >= 3*l and rng.random() < 0.8:
+                i = rng.randrange(len(pattern) - 3*l + 1)
+                window = pattern[i:i+3*l]
+                if rng.random() < 0.5:
+                    window = central_dogma.reverse_complement(window)
+                peptide = central_dogma.translate(central_dogma.transcribe(window), self.code) or 'M'
+            else:
+                peptide = ''.join(rng.choice('ACDEFGHIKLMNPQRSTVWY*') for _ in range(l))
+            expected = reference_find_coding_region(pattern, peptide, self.code)
+            self.assertEqual(central_dogma.find_coding_region(pattern, peptide, self.code), expected,
+                             (pattern, peptide))
+            # windows that only encode the peptide on the reverse strand
+            reverse_hits += sum(central_dogma.translate(central_dogma.transcribe(window), self.code) != peptide
+                                for window in expected)
+        self.assertGreater(reverse_hits, 0)
+
+    def test_overlapping_and_stop(self):
+        pattern = 'ATGATGATGATG'
+        for peptide in ('MM', 'MMM', 'M*', '*'):
+            with self.subTest(peptide=peptide):
+                self.assertEqual(central_dogma.find_coding_region(pattern, peptide, self.code),
+                                 reference_find_coding_region(pattern, peptide, self.code))
+        self.assertEqual(central_dogma.find_coding_region(pattern, 'MM', self.code), ['ATGATG'] * 3)
+        self.assertEqual(central_dogma.find_coding_region('ATGTAA', 'M*', self.code), [])
+
+class TestPeptideSearch(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.genome = ''.join(rng.choice('ACGT') for _ in range(3000))
+        self.code = rna_genetic_code()
+
+    def test_aho_corasick_finds_every_occurrence(self):
+        patterns = ['he', 'she', 'his', 'hers']
+        found = sorted((start, patterns[index]) for start, index in AhoCorasick(patterns).search('ushershis'))
+        self.assertEqual(found, [(1, 'she'), (2, 'he'), (2, 'hers'), (6, 'his')])
+
+    def test_search_peptides_matches_find_peptide(self):
+        peptides = ['MA', 'LL', 'GR', 'SS', 'W']
+        hits = search_peptides(self.genome, peptides, self.code)
+        for peptide in peptides:
+            with self.subTest(peptide=peptide):
+                expected = [(hit.start, hit.end, hit.strand) for hit in find_peptide(self.genome, peptide, self.code)]
+                found = sorted((hit.start, hit.end, hit.strand) for hit in hits if hit.peptide == peptide)
+                self.assertEqual(found, expected)
+                self.assertTrue(expected)
+
+class TestIndexedFasta(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(4)
+        self.records = {
+            'chr1': ''.join(rng.choice('ACGT') for _ in range(2500)),
+            'chr2': ''.join(rng.choice('ACGT') for _ in range(121)),
+        }
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / 'genome.fa'
+        with open(self.path, 'w') as fh:
+            for name, seq in self.records.items():
+                fh.write(f'>{name} description\n')
+                for i in range(0, len(seq), 60):
+                    fh.write(seq[i:i+60] + '\n')
+        self.fasta = IndexedFasta(self.path)
+
+    def tearDown(self):
+        self.fasta.close()
+        self.dir.cleanup()
+
+    def test_fetch_matches_slices(self):
+        rng = random.Random(5)
+        self.assertEqual(self.fasta.names, list(self.records))
+        for name, seq in self.records.items():
+            self.assertEqual(self.fasta.fetch(name), seq)
+            for _ in range(50):
+                start, end = sorted(rng.randrange(len(seq) + 1) for _ in range(2))
+                self.assertEqual(self.fasta.fetch(name, start, end), seq[start:end])
+        self.assertEqual(load_index(self.path), list(self.fasta.entries.values()))
+        self.assertEqual(parse_genome(self.path), ''.join(self.records.values()))
+
+    def test_blank_lines(self):
+        path = Path(self.dir.name) / 'blank.fa'
+        path.write_text('>a\nACGT\n\nTTTT\nGG\n')
+        with self.assertRaises(ValueError):
+            IndexedFasta(path)
+        # blank lines before the sequence or after the record are harmless
+        path.write_text('>a\nACGT\nTTTT\nGG\n\n>b\n\nAC\nG\n')
+        with IndexedFasta(path) as fasta:
+            self.assertEqual([fasta.fetch(name) for name in fasta.names], ['ACGTTTTTGG', 'ACG'])
+
+    def test_iter_coding_regions_matches_in_memory_search(self):
+        code = rna_genetic_code()
+        seq = self.records['chr1']
+        for peptide in ('MA', 'GR', 'SL'):
+            with self.subTest(peptide=peptide):
+                # chunks far smaller than the record, so hits straddle chunk boundaries
+                hits = list(iter_coding_regions(self.fasta, peptide, code, name='chr1', chunk_size=99))
+                expected = find_peptide(seq, peptide, code)
+                self.assertTrue(expected)
+                self.assertEqual(sorted(hits), expected)
 
 
 if __name__ == '__main__':
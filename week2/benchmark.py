@@ -0,0 +1,165 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from deBruijn import DeBruijinGraph, path_to_genome
+from main import kmer_composition
+from read_pairs import paired_de_bruijn_graph, reconstruct_from_read_pairs
+from simplify import assemble
+from simulate import random_genome, simulate_read_pairs, simulate_reads
+
+FORMAT_VERSION = 1
+
+class Recorder:
+    """Times pipeline stages and, when memory is on, records their peak traced allocation."""
+    def __init__(self, memory: bool = True) -> None:
+        self.memory = memory
+        self.stages: dict[str, dict[str, float]] = {}
+
+    def run(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        if self.memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            entry = self.stages[name] = {'seconds': time.perf_counter() - start}
+            if self.memory:
+                entry['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+def bench_single(genome: str, k: int, encoded: bool, memory: bool) -> dict:
+    """kmer_composition -> DeBruijinGraph -> eulerian_path -> path_to_genome."""
+    rec = Recorder(memory)
+    composition = rec.run('kmer_composition', kmer_composition, genome, k)
+    graph = rec.run('de_bruijn', DeBruijinGraph, composition, k, encoded=encoded)
+    del composition
+    path = rec.run('eulerian_path', graph.eulerian_path)
+    text = rec.run('path_to_genome', path_to_genome, path)
+    return {'stages': rec.stages, 'nodes': graph.node_count(), 'edges': graph.edge_count(),
+            'correct': text == genome}
+
+def bench_reads(genome: str, k: int, read_length: int, coverage: float, error_rate: float,
+                min_count: int, seed: int, memory: bool) -> dict:
+    """Simulated reads -> DeBruijinGraph with abundance filtering -> assemble."""
+    rec = Recorder(memory)
+    reads = simulate_reads(genome, read_length, coverage, error_rate, seed=seed)
+    graph = rec.run('de_bruijn', DeBruijinGraph, reads, k, encoded=True, min_count=min_count)
+    contigs = rec.run('assemble', assemble, graph)
+    lengths = sorted(map(len, contigs), reverse=True)
+    return {'stages': rec.stages, 'reads': len(reads), 'nodes': graph.node_count(),
+            'edges': graph.edge_count(), 'contigs': len(contigs),
+            'longest_contig': lengths[0] if lengths else 0, 'assembled_bases': sum(lengths),
+            'misassembled': sum(contig not in genome for contig in contigs)}
+
+def bench_paired(genome: str, k: int, d: int, error_rate: float, seed: int, memory: bool) -> dict:
+    """Simulated (k,d)-mers -> paired de Bruijn graph -> reconstruct_from_read_pairs."""
+    rec = Recorder(memory)
+    pairs = simulate_read_pairs(genome, k, d, error_rate, seed=seed)
+    graph = rec.run('paired_de_bruijn_graph', paired_de_bruijn_graph, pairs)
+    result = {'stages': rec.stages, 'pairs': len(pairs), 'nodes': graph.node_count()}
+    try:
+        text = rec.run('reconstruct_from_read_pairs', reconstruct_from_read_pairs, pairs, k, d)
+    except (ValueError, RuntimeError) as e:
+        result.update(correct=False, error=str(e))
+    else:
+        result['correct'] = text == genome
+    return result
+
+def run(sizes: list[int], k: int = 25, d: int = 100, pipelines: tuple[str, ...] = ('single', 'reads', 'paired'),
+        repeat_fraction: float = 0.0, repeat_length: int = 200, read_length: int = 100,
+        coverage: float = 30.0, error_rate: float = 0.0, min_count: int = 2, encoded: bool = True,
+        memory: bool = True, seed: int = 0) -> dict:
+    """Run every pipeline on a seeded genome of each size and return the results as a JSON-ready dict."""
+    settings = {
+        'k': k, 'd': d, 'repeat_fraction': repeat_fraction, 'repeat_length': repeat_length,
+        'read_length': read_length, 'coverage': coverage, 'error_rate': error_rate,
+        'min_count': min_count, 'encoded': encoded, 'memory': memory, 'seed': seed,
+    }
+    runs = []
+    for size in sizes:
+        genome = random_genome(size, repeat_fraction, repeat_length, seed=seed)
+        for pipeline in pipelines:
+            if pipeline == 'single':
+                result = bench_single(genome, k, encoded, memory)
+            elif pipeline == 'reads':
+                result = bench_reads(genome, k, read_length, coverage, error_rate, min_count, seed, memory)
+            elif pipeline == 'paired':
+                result = bench_paired(genome, k, d, error_rate, seed, memory)
+            else:
+                raise ValueError(f'Unknown pipeline {pipeline!r}')
+            runs.append({'pipeline': pipeline, 'genome_length': size, **result})
+    return {
+        'format_version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': settings,
+        'runs': runs,
+    }
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.25) -> list[str]:
+    """Return a line for every stage that got more than tolerance slower or bigger than in baseline."""
+    before = {(r['pipeline'], r['genome_length']): r for r in baseline['runs']}
+    regressions = []
+    for run in current['runs']:
+        old = before.get((run['pipeline'], run['genome_length']))
+        if old is None:
+            continue
+        if old.get('correct') and not run.get('correct'):
+            regressions.append(f"{run['pipeline']} {run['genome_length']}: no longer reconstructs the genome")
+        for stage, now in run['stages'].items():
+            for metric, value in now.items():
+                was = old['stages'].get(stage, {}).get(metric)
+                if was and value > was * (1 + tolerance):
+                    regressions.append(f"{run['pipeline']} {run['genome_length']} {stage} {metric}: "
+                                       f"{was:.6g} -> {value:.6g} ({value / was - 1:+.0%})")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Time the assembly pipelines on simulated data.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--pipelines', nargs='+', choices=['single', 'reads', 'paired'],
+                        default=['single', 'reads', 'paired'])
+    parser.add_argument('-k', type=int, default=25)
+    parser.add_argument('-d', type=int, default=100)
+    parser.add_argument('--repeat-fraction', type=float, default=0.0)
+    parser.add_argument('--repeat-length', type=int, default=200)
+    parser.add_argument('--read-length', type=int, default=100)
+    parser.add_argument('--coverage', type=float, default=30.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--min-count', type=int, default=2)
+    parser.add_argument('--strings', action='store_true', help='build graphs on string labels')
+    parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc, which slows every stage')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='write JSON here instead of stdout')
+    parser.add_argument('--baseline', help='JSON from an earlier run to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(
+        args.sizes, k=args.k, d=args.d, pipelines=tuple(args.pipelines),
+        repeat_fraction=args.repeat_fraction, repeat_length=args.repeat_length,
+        read_length=args.read_length, coverage=args.coverage, error_rate=args.error_rate,
+        min_count=args.min_count, encoded=not args.strings, memory=not args.no_memory, seed=args.seed,
+    )
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(json.load(fh), results, args.tolerance)
+        for line in regressions:
+            print(line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from fastx import batched, open_text, prefetch, read_sequences
+from kmers import ALPHABET, canonical_kmers, decode, kmer_mask, reverse_complement, reverse_complement_code
+from metrics import NULL_METRICS, Metrics
+
+class CanonicalDeBruijinGraph:
+    """Bidirected de Bruijn graph of double-stranded reads.
+
+    Each node is a k-mer together with its reverse complement, stored once
+    under its canonical code (the smaller of the two 2-bit encodings), so
+    reads from either strand land on the same nodes. Edges are implicit: an
+    oriented k-mer links to every oriented k-mer it overlaps by k-1 bases whose
+    node is present. Traversals carry the forward and reverse-complement codes
+    side by side, so changing strand never re-encodes anything.
+
+    Use an odd k: with an even k some k-mers are their own reverse complement.
+    """
+    def __init__(self, reads: Iterable[str], k: int, min_count: int = 1,
+                 metrics: Metrics | None = None) -> None:
+        self.k = k
+        self.min_count = min_count
+        self.counts = Counter()
+        self.metrics = metrics or NULL_METRICS
+        self._solid = None
+        self.add_reads(reads)
+
+    @classmethod
+    def from_file(cls, path: str | Path, k: int, batch_size: int = 10_000, **kwargs) -> 'CanonicalDeBruijinGraph':
+        """Build a graph by streaming reads from a FASTA or FASTQ file, which may be gzipped."""
+        graph = cls((), k, **kwargs)
+        with open_text(path) as fh:
+            for batch in graph.metrics.iterate('parse', prefetch(batched(read_sequences(fh), batch_size))):
+                graph.add_reads(batch)
+        return graph
+
+    def add_reads(self, reads: Iterable[str]) -> None:
+        """Count the canonical k-mers of more reads."""
+        k, counts = self.k, self.counts
+        with self.metrics.phase('add_reads'):
+            for read in reads:
+                counts.update(canonical_kmers(read, k))
+        self.metrics.gauge('nodes', len(counts))
+        self._solid = None
+
+    @property
+    def kmers(self) -> dict[int, int] | set[int]:
+        """The canonical codes of the k-mers seen at least min_count times."""
+        if self.min_count <= 1:
+            return self.counts
+        if self._solid is None:
+            min_count = self.min_count
+            self._solid = {code for code, n in self.counts.items() if n >= min_count}
+        return self._solid
+
+    def node_count(self) -> int:
+        """Return number of nodes, each covering a k-mer and its reverse complement."""
+        return len(self.kmers)
+
+    def label(self, code: int) -> str:
+        """Return the k-mer spelled by an encoded k-mer."""
+        return decode(code, self.k)
+
+    def __contains__(self, kmer: str) -> bool:
+        """Return True if the graph holds kmer on either strand."""
+        codes = list(canonical_kmers(kmer, self.k)) if len(kmer) == self.k else []
+        return len(codes) == 1 and codes[0] in self.kmers
+
+    def successors(self, forward: int, reverse: int) -> list[tuple[int, int, int]]:
+        """Return (base, code, reverse complement code) for every oriented k-mer following forward.
+
+        forward is an oriented k-mer and reverse its reverse complement.
+        """
+        kmers, mask, shift = self.kmers, kmer_mask(self.k), 2*(self.k-1)
+        head, tail = (forward << 2) & mask, reverse >> 2
+        found = []
+        for base in range(4):
+            code, rc = head | base, tail | (3 - base) << shift
+            if (code if code < rc else rc) in kmers:
+                found.append((base, code, rc))
+        return found
+
+    def _extend(self, forward: int, reverse: int, visited: set[int]) -> list[int]:
+        """Return the bases of the non-branching run after an oriented k-mer, marking its nodes visited."""
+        bases = []
+        while True:
+            after = self.successors(forward, reverse)
+            if len(after) != 1:
+                return bases
+            base, code, rc = after[0]
+            # the next k-mer's predecessors are the reverse complements of its reverse's successors
+            if len(self.successors(rc, code)) != 1:
+                return bases
+            node = code if code < rc else rc
+            if node in visited:
+                return bases
+            visited.add(node)
+            bases.append(base)
+            forward, reverse = code, rc
+
+    def unitigs(self) -> Iterator[str]:
+        """Yield every maximal non-branching path of the bidirected graph once.
+
+        A unitig and its reverse complement are the same path read from
+        opposite ends, so only one of the two strands is yielded; which one is
+        arbitrary.
+        """
+        k, visited = self.k, set()
+        for node in self.kmers:
+            if node in visited:
+                continue
+            visited.add(node)
+            rc = reverse_complement_code(node, k)
+            right = self._extend(node, rc, visited)
+            left = self._extend(rc, node, visited)
+            yield (reverse_complement(''.join([ALPHABET[b] for b in left])) + decode(node, k)
+                   + ''.join([ALPHABET[b] for b in right]))
+
+    def contigs(self) -> list[str]:
+        """Return the string spelled by every unitig."""
+        with self.metrics.phase('unitigs'):
+            return list(self.unitigs())
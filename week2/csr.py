@@ -0,0 +1,283 @@
+import mmap
+import struct
+import sys
+from array import array
+from collections import Counter
+from itertools import accumulate
+from operator import sub
+from pathlib import Path
+from typing import NamedTuple, Sequence
+
+from kmers import ALPHABET, decode
+from metrics import NULL_METRICS, Metrics
+
+# on-disk layout: a fixed header followed by 8-byte aligned sections
+MAGIC = b'CSRGRAPH'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIIIIQQ')
+FLAG_ENCODED = 1
+FLAG_PACKED_LABELS = 2
+FLAG_WEIGHTS = 4
+FLAG_EDGE_LABELS = 8
+FLAG_BIG_ENDIAN = 16
+
+class DegreeStats(NamedTuple):
+    nodes: int
+    edges: int
+    balanced: int
+    semi_balanced: int
+    unbalanced: int
+    head: int | None
+    tail: int | None
+
+def degree_stats(incoming: Sequence[int], outgoing: Sequence[int]) -> DegreeStats:
+    """Classify every node by its in/out degree difference in a single pass."""
+    balance = array('q', map(sub, outgoing, incoming))
+    counts = Counter(balance)
+    semi = counts[1] + counts[-1]
+    head = balance.index(1) if counts[1] else None
+    tail = balance.index(-1) if counts[-1] else None
+    return DegreeStats(
+        nodes=len(balance),
+        edges=sum(outgoing),
+        balanced=counts[0],
+        semi_balanced=semi,
+        unbalanced=len(balance) - counts[0] - semi,
+        head=head,
+        tail=tail,
+    )
+
+def typecode(values: Sequence[int]) -> str:
+    """Return the array typecode of an array or memoryview of integers."""
+    return values.typecode if isinstance(values, array) else values.format
+
+def _padded(size: int) -> int:
+    return -size % 8
+
+class PackedStrings(Sequence[str]):
+    """Read-only sequence of ASCII strings stored back to back in one buffer."""
+    def __init__(self, data: bytes | memoryview, offsets: Sequence[int]) -> None:
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return str(self.data[self.offsets[i]:self.offsets[i+1]], 'ascii')
+
+class CSRGraph:
+    """Directed multigraph in compressed sparse row form.
+
+    The targets of node v are targets[offsets[v]:offsets[v+1]], so edge i is the
+    i-th entry of `targets`. Labels are (k-1)-mers, either as strings or as
+    2-bit packed integers when `encoded` is True. Compacted graphs also carry
+    `edge_labels`, the full string spelled by each edge, and collapsed graphs
+    carry `weights`, the multiplicity of each edge.
+    """
+    def __init__(self, offsets: Sequence[int], targets: Sequence[int], labels: Sequence = (),
+                 label_length: int = 0, encoded: bool = False,
+                 edge_labels: Sequence[str] | None = None,
+                 weights: Sequence[int] | None = None,
+                 in_degree: Sequence[int] | None = None) -> None:
+        self.offsets = offsets
+        self.targets = targets
+        self.labels = labels
+        self.label_length = label_length
+        self.encoded = encoded
+        self.edge_labels = edge_labels
+        self.weights = weights
+        self.in_degree = in_degree
+
+    @classmethod
+    def from_adjacency(cls, adj: dict[int, list[int]], num_nodes: int, collapse: bool = False,
+                       **kwargs) -> 'CSRGraph':
+        """Pack an adjacency list keyed by node ID into CSR arrays.
+
+        With collapse, parallel edges are merged into one edge whose weight is
+        their multiplicity.
+        """
+        offsets = array('Q', [0]) * (num_nodes + 1)
+        targets = array('I' if num_nodes < 2**32 else 'Q')
+        weights = array('L') if collapse else None
+        for node in range(num_nodes):
+            dests = adj.get(node)
+            if dests and collapse:
+                counts = Counter(dests)
+                targets.extend(counts.keys())
+                weights.extend(counts.values())
+            elif dests:
+                targets.extend(dests)
+            offsets[node+1] = len(targets)
+        return cls(offsets, targets, weights=weights, **kwargs)
+
+    def save(self, path: str | Path) -> None:
+        """Write the graph in the versioned binary format read by `load`."""
+        n, m = self.node_count(), self.edge_count()
+        flags = FLAG_BIG_ENDIAN if sys.byteorder == 'big' else 0
+        packed = isinstance(self.labels, (array, memoryview)) and typecode(self.labels) == 'Q'
+        # labels too wide to pack are written as strings, so the file is not encoded
+        flags |= FLAG_ENCODED * (self.encoded and packed) | FLAG_PACKED_LABELS * packed
+        flags |= FLAG_WEIGHTS * (self.weights is not None) | FLAG_EDGE_LABELS * (self.edge_labels is not None)
+        target_size = 4 if typecode(self.targets) == 'I' else 8
+
+        with open(path, 'wb') as fh:
+            def write(data: bytes | memoryview | array) -> None:
+                size = fh.write(data)
+                fh.write(bytes(_padded(size)))
+
+            fh.write(HEADER.pack(MAGIC, FORMAT_VERSION, flags, self.label_length, target_size, n, m))
+            write(array('Q', self.offsets))
+            write(array('I' if target_size == 4 else 'Q', self.targets))
+            write(array('Q', self.in_degrees()))
+            if packed:
+                write(array('Q', self.labels))
+            else:
+                labels = [self.label(node) for node in range(n)]
+                if any(len(label) != self.label_length for label in labels):
+                    raise ValueError('Node labels must all be label_length characters long')
+                write(''.join(labels).encode('ascii'))
+            if self.weights is not None:
+                write(array('Q', self.weights))
+            if self.edge_labels is not None:
+                write(array('Q', [0, *accumulate(map(len, self.edge_labels))]))
+                write(''.join(self.edge_labels).encode('ascii'))
+
+    @classmethod
+    def load(cls, path: str | Path) -> 'CSRGraph':
+        """Memory-map a graph written by `save`.
+
+        Every array is a read-only memoryview over the mapped file, so loading
+        costs no copying and the pages can be shared between processes.
+        """
+        with open(path, 'rb') as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        magic, version, flags, label_length, target_size, n, m = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a CSR graph file')
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported CSR graph format version {version}')
+        if bool(flags & FLAG_BIG_ENDIAN) != (sys.byteorder == 'big'):
+            raise ValueError(f'{path} was written on a machine with a different byte order')
+        pos = HEADER.size
+
+        def take(size: int, fmt: str | None = None) -> memoryview:
+            nonlocal pos
+            section = view[pos:pos+size]
+            pos += size + _padded(size)
+            return section.cast(fmt) if fmt else section
+
+        offsets = take(8 * (n + 1), 'Q')
+        targets = take(target_size * m, 'I' if target_size == 4 else 'Q')
+        in_degree = take(8 * n, 'Q')
+        if flags & FLAG_PACKED_LABELS:
+            labels = take(8 * n, 'Q')
+        else:
+            labels = PackedStrings(take(label_length * n), range(0, label_length * n + 1, label_length or 1))
+        weights = take(8 * m, 'Q') if flags & FLAG_WEIGHTS else None
+        edge_labels = None
+        if flags & FLAG_EDGE_LABELS:
+            label_offsets = take(8 * (m + 1), 'Q')
+            edge_labels = PackedStrings(take(label_offsets[-1]), label_offsets)
+        graph = cls(offsets, targets, labels, label_length=label_length, encoded=bool(flags & FLAG_ENCODED),
+                    edge_labels=edge_labels, weights=weights, in_degree=in_degree)
+        graph._mapped = mapped
+        return graph
+
+    def node_count(self) -> int:
+        """Return number of nodes."""
+        return len(self.offsets) - 1
+
+    def edge_count(self) -> int:
+        """Return number of edges."""
+        return len(self.targets)
+
+    def out_degrees(self) -> array:
+        return array('Q', map(sub, self.offsets[1:], self.offsets[:-1]))
+
+    def in_degrees(self) -> array:
+        if self.in_degree is not None:
+            return self.in_degree
+        degrees = array('Q', [0]) * self.node_count()
+        for node, count in Counter(self.targets).items():
+            degrees[node] = count
+        return degrees
+
+    def degree_stats(self) -> DegreeStats:
+        return degree_stats(self.in_degrees(), self.out_degrees())
+
+    def label(self, node: int) -> str:
+        """Return the (k-1)-mer spelled by a node ID."""
+        if self.encoded:
+            return decode(self.labels[node], self.label_length)
+        return self.labels[node]
+
+    def eulerian_walk(self, start: int, metrics: Metrics = NULL_METRICS) -> tuple[list[int], list[int]]:
+        """Walk every edge reachable from start with an iterative Hierholzer traversal.
+
+        Returns the visited node IDs and the traversed edge indices in order. The
+        graph itself is not modified; a copy of the offsets serves as per-node edge
+        cursors. The deepest the walk stack gets is reported to metrics as stack_depth.
+        """
+        offsets, targets = self.offsets, self.targets
+        cursor = array('Q', offsets)
+        stack, edge_stack = [start], [-1]
+        nodes, edges = [], []
+        track, deepest = metrics.enabled, 0
+        while stack:
+            node = stack[-1]
+            i = cursor[node]
+            if i < offsets[node+1]:
+                cursor[node] = i + 1
+                stack.append(targets[i])
+                edge_stack.append(i)
+            else:
+                if track and len(stack) > deepest:
+                    deepest = len(stack)
+                nodes.append(stack.pop())
+                edges.append(edge_stack.pop())
+        metrics.gauge('stack_depth', deepest)
+        nodes.reverse()
+        edges.pop()
+        edges.reverse()
+        return nodes, edges
+
+    def spell(self, nodes: Sequence[int], edges: Sequence[int] | None = None) -> str:
+        """Return the string spelled by a walk through the graph.
+
+        The edges of the walk are required when the graph carries edge labels.
+        """
+        if self.edge_labels is not None:
+            skip = self.label_length
+            return self.label(nodes[0]) + ''.join([self.edge_labels[e][skip:] for e in edges])
+        if self.encoded:
+            labels = self.labels
+            return self.label(nodes[0]) + ''.join([ALPHABET[labels[v] & 3] for v in nodes[1:]])
+        return self.label(nodes[0]) + ''.join([self.labels[v][-1] for v in nodes[1:]])
+
+    def _eulerian_walk(self, start: int | None, metrics: Metrics = NULL_METRICS) -> tuple[list[int], list[int]]:
+        stats = self.degree_stats()
+        if stats.unbalanced or stats.semi_balanced not in (0, 2):
+            raise ValueError('Graph has no Eulerian path or cycle')
+        if start is None:
+            start = stats.head if stats.semi_balanced else self._first_source()
+        nodes, edges = self.eulerian_walk(start, metrics)
+        if len(edges) != stats.edges:
+            raise ValueError('Graph is not connected')
+        return nodes, edges
+
+    def eulerian_path(self, start: int | None = None, metrics: Metrics = NULL_METRICS) -> list[int]:
+        """Return the node IDs of an Eulerian path or cycle."""
+        return self._eulerian_walk(start, metrics)[0]
+
+    def eulerian_genome(self, start: int | None = None) -> str:
+        """Return the string spelled by an Eulerian path or cycle."""
+        return self.spell(*self._eulerian_walk(start))
+
+    def _first_source(self) -> int:
+        offsets = self.offsets
+        for node in range(self.node_count()):
+            if offsets[node+1] > offsets[node]:
+                return node
+        return 0
@@ -1,3 +1,15 @@
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator
+from csr import CSRGraph, DegreeStats, degree_stats
+from fastx import batched, open_text, prefetch, read_sequences
+from kmers import decode, kmer_mask, label_store, rolling_kmers
+from metrics import NULL_METRICS, Metrics
+from parallel import count_kmers
+from sketch import CountMinSketch
+from spelling import spell
+
 class Node:
     def __init__(self, kmer: str) -> None:
         self.kmer = kmer
@@ -27,44 +39,218 @@ class DeBruijinGraph:
         """Return composition of a string, with each element having length k."""
         return [read[i:i+k] for i in range(len(read)-(k-1))]
 
-    def __init__(self, reads: list[str], k: int) -> None:
-        self.G = {}
-        self.nodes = {}
+    def __init__(self, reads: Iterable[str], k: int, encoded: bool = False, workers: int = 1,
+                 min_count: int = 1, sketch_width: int = 1 << 22, sketch_depth: int = 4,
+                 metrics: Metrics | None = None) -> None:
+        """Build a deBruijn graph from reads.
+
+        Nodes are stored as integer IDs. In encoded mode the (k-1)-mer labels are
+        2-bit packed integers and are only decoded when a path is spelled out.
+        With more than one worker the k-mers are counted on a process pool
+        (encoded mode only). Nodes and edges are still added by this process,
+        which caps the speedup at a few times the serial build, more at higher
+        coverage (see `parallel.count_kmers`).
+
+        With min_count above 1, k-mers seen fewer than min_count times are left
+        out. A first pass records occurrences in a count-min sketch of
+        sketch_width x sketch_depth cells, so reads must be iterable twice;
+        parallel construction filters on exact counts instead.
+
+        Pass a `metrics.Metrics` to record phase timings and graph counters;
+        while building, k-mers of each batch are then listed before they are
+        added so that chopping and node creation are timed separately.
+        """
+        self.G: dict[int, list[int]] = {}
+        self.nodes: dict[str | int, int] = {}
+        self.labels = label_store(k-1, encoded)
+        self.incoming = array('L')
+        self.outgoing = array('L')
         self.k = k
+        self.encoded = encoded
+        self.min_count = min_count
+        self.sketch = None
+        self.dropped = Counter()
+        self.metrics = metrics or NULL_METRICS
+
+        self._csr = {}
+        self._stats = None
+        if min_count > 1 and workers == 1:
+            if iter(reads) is reads:
+                raise TypeError('Abundance filtering needs reads that can be iterated twice')
+            self.sketch = CountMinSketch(sketch_width, sketch_depth)
+            self.count_reads(reads)
+        self.add_reads(reads, workers=workers)
+
+    @classmethod
+    def from_file(cls, path: str | Path, k: int | None = None, batch_size: int = 10_000,
+                  encoded: bool = False, workers: int = 1, **kwargs) -> 'DeBruijinGraph':
+        """Build a graph by streaming reads from a FASTA, FASTQ or k-mer file.
+
+        Files may be gzipped. When k is not given the file is expected to hold k
+        on its first line followed by whitespace-separated k-mers. Keyword
+        arguments for abundance filtering are passed on to the constructor; the
+        file is then streamed twice.
+        """
+        with open_text(path) as fh:
+            if k is None:
+                k = int(fh.readline())
+            start = fh.tell()
+            graph = cls((), k, encoded=encoded, **kwargs)
+            metrics = graph.metrics
+            if workers > 1:
+                graph.add_reads(read_sequences(fh), workers=workers)
+                return graph
+            if graph.sketch is not None:
+                for batch in metrics.iterate('parse', prefetch(batched(read_sequences(fh), batch_size))):
+                    graph.count_reads(batch)
+                fh.seek(start)
+            for batch in metrics.iterate('parse', prefetch(batched(read_sequences(fh), batch_size))):
+                graph.add_reads(batch)
+        return graph
+
+    def _kmers(self, reads: Iterable[str]) -> Iterator[str | int]:
+        """Yield every k-mer of the reads, encoded in encoded mode."""
+        k = self.k
+        if self.encoded:
+            for read in reads:
+                yield from rolling_kmers(read, k)
+        else:
+            for read in reads:
+                yield from self.chop(read, k)
 
-        # build deBruijn graph
-        for read in reads:
-            for kmer in self.chop(read, k):
-                prefix, suffix = kmer[:-1], kmer[1:]
-                nodeL, nodeR = None, None
-                if prefix in self.nodes:
-                    nodeL = self.nodes[prefix]
-                else:
-                    nodeL = self.nodes[prefix] = Node(prefix)
-                if suffix in self.nodes:
-                    nodeR = self.nodes[suffix]
-                else:
-                    nodeR = self.nodes[suffix] = Node(suffix)
-                nodeL.outgoing += 1
-                nodeR.incoming += 1
-                self.G.setdefault(nodeL, [])
-                self.G[nodeL].append(nodeR)
-
-        # check for balanced nodes
-        self.num_semi = 0
-        self.num_balanced = 0
-        self.num_unbalanced = 0
-        for node in self.nodes.values():
-            if node.is_balanced():
-                self.num_balanced += 1
-            elif node.is_semi_balanced():
-                if node.incoming == node.outgoing + 1:
-                    self.tail = node
-                if node.incoming == node.outgoing - 1:
-                    self.head = node
-                self.num_semi += 1
+    def _solid_kmers(self, kmers: Iterable[str | int]) -> Iterator[str | int]:
+        """Yield the k-mers whose estimated count reaches min_count, tallying the rest."""
+        count, min_count, dropped = self.sketch.count, self.min_count, self.dropped
+        for kmer in kmers:
+            n = count(kmer)
+            if n >= min_count:
+                yield kmer
             else:
-                self.num_unbalanced += 1
+                dropped[n] += 1
+
+    def count_reads(self, reads: Iterable[str]) -> None:
+        """Record the k-mers of reads in the abundance sketch (first filtering pass)."""
+        with self.metrics.phase('count_reads'):
+            self.sketch.update(self._kmers(reads))
+
+    def add_reads(self, reads: Iterable[str], workers: int = 1) -> None:
+        """Add the k-mers of more reads to the graph."""
+        k, metrics = self.k, self.metrics
+        with metrics.phase('add_reads'):
+            if workers > 1:
+                if not self.encoded:
+                    raise ValueError('Parallel construction requires encoded=True')
+                for kmers, counts in metrics.iterate('count_kmers', count_kmers(reads, k, workers)):
+                    with metrics.phase('add_edges'):
+                        self._add_kmers(kmers, counts)
+                    metrics.count('kmers', sum(counts))
+            else:
+                kmers = self._kmers(reads)
+                if self.sketch is not None:
+                    kmers = self._solid_kmers(kmers)
+                if metrics.enabled:
+                    with metrics.phase('chop'):
+                        kmers = list(kmers)
+                    metrics.count('kmers', len(kmers))
+                with metrics.phase('add_edges'):
+                    if self.encoded:
+                        mask = kmer_mask(k-1)
+                        for kmer in kmers:
+                            self._add_edge(kmer >> 2, kmer & mask)
+                    else:
+                        for kmer in kmers:
+                            self._add_edge(kmer[:-1], kmer[1:])
+            metrics.gauge('nodes', len(self.labels))
+        self._csr = {}
+        self._stats = None
+
+    def drop_counts(self) -> dict[int, int]:
+        """Return how many k-mer occurrences each abundance threshold up to min_count drops."""
+        return {
+            threshold: sum(n for count, n in self.dropped.items() if count < threshold)
+            for threshold in range(2, self.min_count + 1)
+        }
+
+    def _node_id(self, label: str | int) -> int:
+        """Return the ID of the node with the given label, creating it if needed."""
+        node = self.nodes.get(label)
+        if node is None:
+            node = self.nodes[label] = len(self.labels)
+            self.labels.append(label)
+            self.incoming.append(0)
+            self.outgoing.append(0)
+        return node
+
+    def _add_edge(self, prefix: str | int, suffix: str | int) -> None:
+        src, dest = self._node_id(prefix), self._node_id(suffix)
+        self.outgoing[src] += 1
+        self.incoming[dest] += 1
+        self.G.setdefault(src, []).append(dest)
+
+    def _add_kmers(self, kmers: Iterable[int], counts: Iterable[int]) -> None:
+        """Add encoded k-mers as edges, each repeated by its count."""
+        mask = kmer_mask(self.k-1)
+        for kmer, count in zip(kmers, counts):
+            if count < self.min_count:
+                self.dropped[count] += count
+                continue
+            src, dest = self._node_id(kmer >> 2), self._node_id(kmer & mask)
+            self.outgoing[src] += count
+            self.incoming[dest] += count
+            self.G.setdefault(src, []).extend([dest] * count)
+
+    @property
+    def stats(self) -> DegreeStats:
+        """Node and edge counts with the balance of every node."""
+        if self._stats is None:
+            with self.metrics.phase('degree_balance'):
+                self._stats = stats = degree_stats(self.incoming, self.outgoing)
+            for name in ('nodes', 'edges', 'semi_balanced', 'unbalanced'):
+                self.metrics.gauge(name, getattr(stats, name))
+        return self._stats
+
+    @property
+    def head(self) -> int | None:
+        return self.stats.head
+
+    @property
+    def tail(self) -> int | None:
+        return self.stats.tail
+
+    @property
+    def num_semi(self) -> int:
+        return self.stats.semi_balanced
+
+    @property
+    def num_balanced(self) -> int:
+        return self.stats.balanced
+
+    @property
+    def num_unbalanced(self) -> int:
+        return self.stats.unbalanced
+
+    def csr(self, collapse: bool = False) -> CSRGraph:
+        """Return a compressed sparse row copy of the graph.
+
+        With collapse, repeated k-mers become a single edge weighted by their count.
+        """
+        if collapse not in self._csr:
+            with self.metrics.phase('csr'):
+                self._csr[collapse] = CSRGraph.from_adjacency(
+                    self.G, self.node_count(), collapse=collapse, labels=self.labels,
+                    label_length=self.k-1, encoded=self.encoded,
+                )
+        return self._csr[collapse]
+
+    def save(self, path: str | Path) -> None:
+        """Write the graph to disk; reopen it with `CSRGraph.load`."""
+        self.csr().save(path)
+
+    def label(self, node: int) -> str:
+        """Return the (k-1)-mer spelled by a node ID."""
+        if self.encoded:
+            return decode(self.labels[node], self.k-1)
+        return self.labels[node]
 
     def node_count(self) -> int:
         """Return number of nodes."""
@@ -72,7 +258,7 @@ class DeBruijinGraph:
 
     def edge_count(self) -> int:
         """Return number of edges."""
-        return len(self.G)
+        return self.stats.edges
 
     def has_eulerian_path(self) -> bool:
         """Return True if all nodes are balanced excpeced for starting and ending nodes."""
@@ -88,29 +274,14 @@ class DeBruijinGraph:
 
     def eulerian_path(self) -> list[str]:
         """Find and return Eulerian path or cycle."""
-        assert self.is_eulerian()
-        g = self.G.copy()
-        path = []
-
-        def __visit(node: Node) -> None:
-            while len(g[node]) > 0:
-                dest = g[node].pop()
-                __visit(dest)
-            path.append(node)
-
-        if self.has_eulerian_path():
-            assert self.head is not None
-            assert self.tail is not None
-            g.setdefault(self.tail, [])
-
-        __visit(self.head) if self.has_eulerian_path() else __visit(next(iter(g.keys())))
-        path = path[::-1]
-
-        if self.has_eulerian_path():
-            start = path.index(self.head)
-            path = path[start:] + path[:start]
-
-        return list(map(str, path))
+        if not self.is_eulerian():
+            raise ValueError('Graph has no Eulerian path or cycle')
+        start = self.head if self.has_eulerian_path() else next(iter(self.G))
+        graph = self.csr()
+        with self.metrics.phase('traversal'):
+            path = graph.eulerian_path(start, metrics=self.metrics)
+        with self.metrics.phase('labels'):
+            return list(map(self.label, path))
 
 def parse_file(path) -> tuple[int, list[str]]:
     with open(path, 'r') as fh:
@@ -120,20 +291,16 @@ def parse_file(path) -> tuple[int, list[str]]:
     return k, kmers
 
 def path_to_genome(path) -> str:
-    genome = path[0]
-    for i in range(1, len(path)):
-        genome += path[i][-1]
-    return genome
+    return spell(path)
 
 def main() -> None:
+    from simplify import assemble
+
     file_num = 8
     path = f'/home/dagsdags/home/courses/ucsd-bioinformatics-specialization/course-2/datasets/string_reconstruction/input_{file_num}.txt'
-    k, kmers = parse_file(path)
-
-    dbg = DeBruijinGraph(reads=kmers, k=k)
-    path = dbg.eulerian_path()
-    genome = path_to_genome(path)
-    print(genome)
+    dbg = DeBruijinGraph.from_file(path)
+    for contig in assemble(dbg):
+        print(contig)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,100 @@
+import gzip
+import io
+import queue
+import threading
+from itertools import chain, islice
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO, TypeVar
+
+T = TypeVar('T')
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+def open_text(path: str | Path) -> TextIO:
+    """Open a plain or gzip-compressed text file, detected from its magic bytes."""
+    with open(path, 'rb') as fh:
+        magic = fh.read(2)
+    if magic == GZIP_MAGIC:
+        return io.TextIOWrapper(gzip.open(path, 'rb'))
+    return open(path, 'r')
+
+def read_fasta(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the sequence of every record in a FASTA file."""
+    seq = []
+    for line in lines:
+        if line.startswith('>'):
+            if seq:
+                yield ''.join(seq)
+            seq = []
+        else:
+            seq.append(line.strip())
+    if seq:
+        yield ''.join(seq)
+
+def read_fastq(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the sequence of every record in a FASTQ file."""
+    it = iter(lines)
+    for header in it:
+        if not header.strip():
+            continue
+        if not header.startswith('@'):
+            raise ValueError(f'Malformed FASTQ record header: {header.rstrip()!r}')
+        seq = next(it).strip()
+        next(it)
+        next(it)
+        yield seq
+
+def read_tokens(fh: TextIO, chunk_size: int = 1 << 20) -> Iterator[str]:
+    """Yield whitespace-separated tokens, reading at most chunk_size characters at a time."""
+    rest = ''
+    while chunk := fh.read(chunk_size):
+        tokens = (rest + chunk).split()
+        rest = '' if chunk[-1].isspace() else tokens.pop() if tokens else ''
+        yield from tokens
+    if rest:
+        yield rest
+
+def read_sequences(fh: TextIO) -> Iterator[str]:
+    """Yield sequences from a FASTA, FASTQ or whitespace-separated k-mer file."""
+    first = fh.readline()
+    if first.startswith('>'):
+        return read_fasta(chain([first], fh))
+    if first.startswith('@'):
+        return read_fastq(chain([first], fh))
+    return chain(first.split(), read_tokens(fh))
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Group items into lists of at most size elements."""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+def read_batches(path: str | Path, batch_size: int = 10_000) -> Iterator[list[str]]:
+    """Stream the reads of a (possibly gzipped) FASTA/FASTQ file in bounded batches."""
+    with open_text(path) as fh:
+        yield from batched(read_sequences(fh), batch_size)
+
+def prefetch(items: Iterable[T], depth: int = 2) -> Iterator[T]:
+    """Produce items on a background thread, keeping at most depth of them queued.
+
+    This lets file reading and decompression overlap with whatever the consumer
+    does with each item.
+    """
+    q = queue.Queue(maxsize=depth)
+    done = object()
+    errors = []
+
+    def produce() -> None:
+        try:
+            for item in items:
+                q.put(item)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            q.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while (item := q.get()) is not done:
+        yield item
+    if errors:
+        raise errors[0]
@@ -1,13 +1,18 @@
 import itertools
 import random
 from pathlib import Path
+from csr import CSRGraph
+from spelling import spell
 from typing import TypedDict, List, Optional
 
 # ===== Eulerian Path Problem ===== #
 class Node:
-    def __init__(self, value) -> None:
+    __slots__ = ('_value', 'id', 'incoming', 'outgoing', 'edges')
+
+    def __init__(self, value, id: int = -1) -> None:
         if isinstance(value, (int, str)):
             self._value = value
+            self.id = id
             self.incoming = 0
             self.outgoing = 0
             self.edges = []
@@ -15,10 +20,7 @@ class Node:
             raise ValueError('Value must be of type int or str. Given value is of type ' + str(type(value)))
 
     def __hash__(self) -> int:
-        count = 0
-        for i, char in enumerate(str(self._value)):
-            count += ord(char) * (i+5) ** 2
-        return hash(count)
+        return hash(self._value)
 
     def __str__(self) -> str:
         return str(self._value)
@@ -36,7 +38,7 @@ class Node:
         return Edge(other, self)
 
     def __eq__(self, other: 'Node') -> bool:
-        return hash(self) == hash(other)
+        return isinstance(other, Node) and self._value == other._value
 
     def __gt__(self, other: 'Node') -> None:
         pass
@@ -48,13 +50,13 @@ class Node:
         return str(self._value)[idx]
 
     def __lshift__(self, other: 'Node') -> bool:
-        if isinstance(other.value(), str) and isinstance(self.value(), str):
-            return self.prefix() == other.suffix()
+        if isinstance(other.value, str) and isinstance(self.value, str):
+            return self.prefix == other.suffix
         raise TypeError('Node object must be initialized with a string value')
 
     def __rshift__(self, other: 'Node') -> bool:
-        if isinstance(other.value(), str) and isinstance(self.value(), str):
-            return self.suffix() == other.prefix()
+        if isinstance(other.value, str) and isinstance(self.value, str):
+            return self.suffix == other.prefix
         raise TypeError('Node object must be initialized with a string value')
 
     def __contains__(self, other: list) -> bool:
@@ -80,22 +82,19 @@ class Node:
         return self.incoming == self.outgoing
 
 class Edge:
+    __slots__ = ('_src', '_dest')
+
     def __init__(self, src: Node, dest: Node) -> None:
         src.outgoing += 1
-        src.edges += [self]
+        src.edges.append(self)
         self._src = src
 
         dest.incoming += 1
-        dest.edges += [self]
+        dest.edges.append(self)
         self._dest = dest
 
     def __hash__(self) -> int:
-        count = 0
-        for i in self.src:
-            count += ord(i)
-        for j in self.dest:
-            count += ord(j)
-        return hash(count)
+        return hash((self.src.value, self.dest.value))
 
     def __repr__(self):
         return f"{self.src}->{self.dest}"
@@ -103,12 +102,8 @@ class Edge:
     def __str__(self):
         return f"{self.src}->{self.dest}"
 
-    def __del__(self):
-        self.src.outgoing -= 1
-        self.dest.incoming -= 1
-
     def __eq__(self, other) -> bool:
-        return hash(self) == hash(other)
+        return isinstance(other, Edge) and self.src == other.src and self.dest == other.dest
 
     @property
     def src(self) -> Node:
@@ -125,78 +120,57 @@ class AdjacencyMatrix(TypedDict):
 class DirectedGraph:
     def __init__(self, adjList: AdjacencyMatrix):
         self.adj_list = adjList
-        self.nodes = self._generate_nodes()
+        self.ids: dict[int | str, int] = {}
+        self.nodes: list[Node] = []
         self.edges = self._generate_edges()
         self.g = self._generate_graph()
-        self._balance_nodes()
 
+    def _node(self, value: int | str) -> Node:
+        """Return the node holding value, creating it with the next integer ID if needed."""
+        id = self.ids.get(value)
+        if id is None:
+            id = self.ids[value] = len(self.nodes)
+            self.nodes.append(Node(value, id))
+        return self.nodes[id]
 
     def _generate_nodes(self) -> list[Node]:
-        parents = set(self.adj_list.keys())
-        children = set([item for sl in self.adj_list.values() for item in sl])
-        nodes = map(Node, (parents | children))
-        return list(nodes)
-
-    def _generate_edges(self)-> List[Edge]:
-        edges = []
         for src, dests in self.adj_list.items():
+            self._node(src)
             for dest in dests:
-                edges += [Edge(Node(src), Node(dest))]
-        return edges
+                self._node(dest)
+        return self.nodes
+
+    def _generate_edges(self) -> List[Edge]:
+        self._generate_nodes()
+        return [Edge(self._node(src), self._node(dest))
+                for src, dests in self.adj_list.items() for dest in dests]
 
     def _generate_graph(self) -> dict:
         graph = {}
-        for src, dests in self.adj_list.items():
-            parent = Node(src)
-            parent.outgoing += len(dests)
-            graph[Node(src)] = list(map(Node, dests))
+        for edge in self.edges:
+            graph.setdefault(edge.src, []).append(edge.dest)
         return graph
 
     def _balance_nodes(self, display=False) -> None:
-        keys = list(self.g.keys())
-        values = [d for dest in self.g.values() for d in dest]
-
-        for src in self.g.keys():
-            src.outgoing += len(self.g[src])
-            src.incoming += values.count(src)
-
-        for dests in self.g.values():
-            for dest in dests:
-                if dest in keys:
-                    dest.incoming += len(self.g[dest])
-                    dest.outgoing += values.count(dest)
-                else:
-                    dest.incoming += 1
-
+        """Recount node degrees from the edge list."""
+        for node in self.nodes:
+            node.incoming = node.outgoing = 0
+        for edge in self.edges:
+            edge.src.outgoing += 1
+            edge.dest.incoming += 1
         if display: print('Balancing done!')
 
+    def to_csr(self) -> CSRGraph:
+        """Return the graph as CSR arrays over the integer node IDs."""
+        adj = {src.id: [dest.id for dest in dests] for src, dests in self.g.items()}
+        return CSRGraph.from_adjacency(adj, len(self.nodes), labels=self.nodes)
+
     def find_path(self) -> List[Node]:
-        def get_start():
-            for src in self.g.keys():
-                if src.outgoing > src.incoming:
-                    return src
-
-        def get_end():
-            for dests in self.g.values():
-                for dest in dests:
-                    if dest.outgoing == 0:
-                        return dest
-
-        start, end = get_start(), get_end()
-
-        path = [end]
-        stack = [start]
-        graph = self.g.copy()
-
-        while stack:
-            current = stack[-1]
-            if len(graph[current]) > 0:
-                child = graph[current].pop(0)
-                if child != end:
-                    stack.append(child)
-            else:
-                n = stack.pop()
-                path = [n] + path
+        start = next((node for node in self.nodes if node.outgoing > node.incoming), None)
+        if start is None:
+            start = next(iter(self.g))
+        nodes, _ = self.to_csr().eulerian_walk(start.id)
+        path = [self.nodes[id] for id in nodes]
         print(' -> '.join([str(p.value) for p in path]))
         return path
 
@@ -209,10 +183,14 @@ class DeBruijin:
     def __init__(self, kmers, k):
         self.kmers = kmers
         self.k = k
-        self.nodes = [Node(kmer) for kmer in kmers]
+        self.ids: dict[str, int] = {}
+        self.nodes: list[Node] = []
+        for kmer in kmers:
+            if kmer not in self.ids:
+                self.ids[kmer] = len(self.nodes)
+                self.nodes.append(Node(kmer, len(self.nodes)))
         self.edges = self._generate_edges()
         self.g = self._generate_graph()
-        self._balance_nodes()
         self.path = self.find_path()
         self.genome = self.construct_genome()
 
@@ -228,67 +206,51 @@ class DeBruijin:
 
 
     def _generate_edges(self) -> list[Edge]:
-        edges = []
-        for n1 in self.nodes:
-            for n2 in self.nodes:
-                if n1 == n2: continue
-                if n1.suffix == n2.prefix:
-                    e = Edge(n1, n2)
-                    if e not in edges:
-                        edges.append(e)
-                    else:
-                        del e
-        return edges
+        """Link every k-mer to the other k-mers whose prefix is its suffix."""
+        by_prefix: dict[str, list[Node]] = {}
+        for node in self.nodes:
+            by_prefix.setdefault(node.prefix, []).append(node)
+        return [Edge(n1, n2) for n1 in self.nodes
+                for n2 in by_prefix.get(n1.suffix, ()) if n2 is not n1]
 
     def _generate_graph(self) -> dict:
         graph = {}
         for edge in self.edges:
-            if edge.src not in graph:
-                graph[edge.src] = [edge.dest]
-            else:
-                graph[edge.src].append(edge.dest)
+            graph.setdefault(edge.src, []).append(edge.dest)
         return graph
 
     def _balance_nodes(self) -> None:
-        values = [i for sl in self.g.values() for i in sl]
-
-        for key in self.g.keys():
-            key.outgoing = len(self.g[key])
-            key.incoming = values.count(key)
+        """Recount node degrees from the edge list."""
+        for node in self.nodes:
+            node.incoming = node.outgoing = 0
+        for edge in self.edges:
+            edge.src.outgoing += 1
+            edge.dest.incoming += 1
 
-        for values in self.g.values():
-            for value in values:
-                value.outgoing = len(self.g[value]) if value in self.g else 0
-                value.incoming = values.count(value)
+    def to_csr(self) -> CSRGraph:
+        """Return the graph as CSR arrays over the integer node IDs."""
+        adj = {src.id: [dest.id for dest in dests] for src, dests in self.g.items()}
+        return CSRGraph.from_adjacency(adj, len(self.nodes), labels=self.nodes)
 
     def find_starting_node(self) -> Node | None:
-        for node in self.g.keys():
+        for node in self.nodes:
             if node.incoming < node.outgoing:
                 return node
 
     def find_ending_node(self) -> Node | None:
-        for nodes in self.g.values():
-            for node in nodes:
-                if node.incoming > node.outgoing:
-                    return node
+        for node in self.nodes:
+            if node.incoming > node.outgoing:
+                return node
 
     def find_path(self, display: bool = False) -> list[Node]:
-        # initialize stack with the starting node, and path with the ending node
+        if not self.g:
+            self.path = []
+            return self.path
         start = self.find_starting_node()
-        end = self.find_ending_node()
-        stack = [start]
-        path = [end]
-        graph = self.g.copy()
-
-        while stack:
-            current = stack[-1]
-            if len(graph[current]) > 0:
-                child = graph[current].pop()
-                if child != end:
-                    stack.append(child)
-            else:
-                n = stack.pop()
-                path = [n] + path
+        if start is None:
+            start = next(iter(self.g))
+        nodes, _ = self.to_csr().eulerian_walk(start.id)
+        path = [self.nodes[id] for id in nodes]
         # display eulerian path
         if display:
             print('->'.join([str(p.value) for p in path]))
@@ -297,10 +259,7 @@ class DeBruijin:
 
     def construct_genome(self) -> str | None:
         if self.path:
-            genome = self.path[0].value
-            for node in self.path[1:]:
-                genome += node[-1]
-            return genome
+            return spell(self.path)
 
     def has_eulerian_path(self) -> bool:
         unbalanced_count = 0
@@ -330,7 +289,10 @@ def parse_file(path):
     fh.close()
     return k, kmers
 
-k, kmers = parse_file(PATH)
-graph = DeBruijin(kmers, 4)
+def main() -> None:
+    k, kmers = parse_file(PATH)
+    graph = DeBruijin(kmers, 4)
+    print(graph.edges)
 
-print(graph.edges)
+if __name__ == '__main__':
+    main()
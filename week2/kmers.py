@@ -0,0 +1,209 @@
+import re
+import sys
+from array import array
+from collections import Counter
+from itertools import chain, product, repeat
+from typing import Iterator, Sequence
+
+ALPHABET = 'ACGT'
+
+# translation tables for packing DNA 2 bits per base (A=00, C=01, G=10, T=11)
+_DIGITS = str.maketrans('ACGTacgt', '01230123')
+_CODES = bytes.maketrans(b'ACGTacgt', bytes([0, 1, 2, 3, 0, 1, 2, 3]))
+_INVALID = re.compile('[^ACGTacgt]+')
+_NON_DNA = re.compile('[^ACGT]')
+
+# complements the four 2-bit bases packed in a byte and reverses their order
+_RC_BYTE = bytes(
+    sum((3 - (b >> 2*i & 3)) << 2*(3-i) for i in range(4)) for b in range(256)
+)
+_COMPLEMENT = str.maketrans('ACGTacgt', 'TGCAtgca')
+
+# every 6-mer in code order, so decoding takes one lookup per 6 bases
+_CHUNK = 6
+_CHUNK_MASK = (1 << 2*_CHUNK) - 1
+_CHUNKS = [''.join(bases) for bases in product(ALPHABET, repeat=_CHUNK)]
+
+# k-mers up to 32 bases are computed and decoded in 64-bit lanes of one big integer
+_LANE_BASES = 32
+_LANE_BLOCK = 1 << 20
+_BIG_ENDIAN = sys.byteorder == 'big'
+# base p (0-3, from the left) of every byte holding four packed bases
+_BYTE_BASES = [bytes(ALPHABET.encode()[b >> 2*(3-p) & 3] for b in range(256)) for p in range(4)]
+
+def encode(kmer: str) -> int:
+    """Pack a DNA string into an integer using 2 bits per base."""
+    return int(kmer.translate(_DIGITS), 4)
+
+def encode_all(kmers: Sequence[str], k: int) -> array | list:
+    """Encode many k-mers at once, translating them as a single string."""
+    codes = label_store(k)
+    codes.extend(map(int, ' '.join(kmers).translate(_DIGITS).split(), repeat(4)))
+    return codes
+
+def decode(code: int, k: int) -> str:
+    """Unpack an integer produced by `encode` back into a DNA string of length k."""
+    chunks = []
+    while k > _CHUNK:
+        chunks.append(_CHUNKS[code & _CHUNK_MASK])
+        code >>= 2*_CHUNK
+        k -= _CHUNK
+    chunks.append(_CHUNKS[code][_CHUNK-k:])
+    chunks.reverse()
+    return ''.join(chunks)
+
+def reverse_complement(text: str) -> str:
+    """Return the reverse complement of a DNA string."""
+    return text.translate(_COMPLEMENT)[::-1]
+
+def reverse_complement_code(code: int, k: int) -> int:
+    """Return the encoding of the reverse complement of an encoded k-mer.
+
+    Complementing is an XOR with 0b11 per base; the byte table does that and
+    reverses the four bases of each byte, and reading the bytes back in the
+    opposite order reverses the rest.
+    """
+    n = (k + 3) // 4
+    rc = int.from_bytes(code.to_bytes(n, 'little').translate(_RC_BYTE), 'big')
+    return rc >> 2*(4*n - k)
+
+def canonical_code(code: int, k: int) -> int:
+    """Return the smaller of an encoded k-mer and its reverse complement."""
+    return min(code, reverse_complement_code(code, k))
+
+def kmer_mask(k: int) -> int:
+    """Return the bit mask covering an encoded k-mer."""
+    return (1 << 2*k) - 1
+
+def label_store(k: int, encoded: bool = True) -> array | list:
+    """Return an empty container for k-mer labels, packed when encoded k-mers fit 64 bits."""
+    return array('Q') if encoded and k <= 32 else []
+
+def valid_segments(read: str, k: int) -> Iterator[str]:
+    """Yield the stretches of a read made only of ACGT that hold at least one k-mer."""
+    for segment in _INVALID.split(read):
+        if len(segment) >= k:
+            yield segment
+
+def rolling_kmers(read: str, k: int) -> Iterator[int]:
+    """Yield the encoding of every k-mer in a read with a rolling 2-bit window.
+
+    K-mers overlapping a base outside ACGT (e.g. N) are skipped.
+    """
+    mask = kmer_mask(k)
+    for segment in valid_segments(read, k):
+        code = encode(segment[:k-1]) if k > 1 else 0
+        for base in segment[k-1:].encode().translate(_CODES):
+            code = ((code << 2) | base) & mask
+            yield code
+
+def canonical_kmers(read: str, k: int) -> Iterator[int]:
+    """Yield the canonical encoding of every k-mer in a read.
+
+    The forward and reverse-complement codes are rolled together, so each
+    k-mer costs a few bit operations. K-mers overlapping a base outside ACGT
+    are skipped.
+    """
+    mask, shift = kmer_mask(k), 2*(k-1)
+    for segment in valid_segments(read, k):
+        forward = encode(segment[:k-1]) if k > 1 else 0
+        reverse = reverse_complement_code(forward, k-1) << 2 if k > 1 else 0
+        for base in segment[k-1:].encode().translate(_CODES):
+            forward = ((forward << 2) | base) & mask
+            reverse = (reverse >> 2) | (3 - base) << shift
+            yield forward if forward < reverse else reverse
+
+def is_dna(text: str) -> bool:
+    """Return True if text only holds the uppercase bases ACGT."""
+    return _NON_DNA.search(text) is None
+
+def _lane_codes(segment: str, k: int) -> array:
+    """Return the codes of every k-mer of an ACGT-only string, for k up to 32.
+
+    Each base becomes one 64-bit lane of a big integer; codes of length a+b
+    are codes of length a shifted by b bases plus codes of length b read a
+    lanes further on, so log2(k) shift-and-adds over the whole string build
+    every code at once. A lane never exceeds 4**k, so lanes never carry.
+    """
+    n = len(segment)
+    lanes = bytearray(8*n)
+    lanes[0::8] = segment.encode().translate(_CODES)
+    power = int.from_bytes(lanes, 'little')
+    codes, size, span = 0, 0, 1
+    while k:
+        if k & 1:
+            codes = (codes << 2*span) + (power >> 64*size)
+            size += span
+        k >>= 1
+        if k:
+            power = (power << 2*span) + (power >> 64*span)
+            span *= 2
+    result = array('Q')
+    result.frombytes(codes.to_bytes(8*n, 'little')[:8*(n-size+1)])
+    if _BIG_ENDIAN:
+        result.byteswap()
+    return result
+
+def kmer_codes(text: str, k: int) -> array | list:
+    """Return the encoding of every k-mer of a DNA string, in text order.
+
+    K-mers overlapping bases other than ACGT are skipped.
+    """
+    codes = label_store(k)
+    if k > _LANE_BASES:
+        codes.extend(rolling_kmers(text, k))
+        return codes
+    for segment in valid_segments(text, k):
+        # blocks overlap by k-1 bases so that no k-mer is lost between them
+        for start in range(0, len(segment) - k + 1, _LANE_BLOCK):
+            codes.extend(_lane_codes(segment[start:start+_LANE_BLOCK+k-1], k))
+    return codes
+
+def decode_all(codes: Sequence[int], k: int) -> list[str]:
+    """Decode many k-mer codes at once.
+
+    For k up to 32 the codes are aligned to the top of 64-bit lanes and
+    written out big-endian, four bases per byte; four byte translations then
+    spell every base without a Python-level loop.
+    """
+    if k > _LANE_BASES:
+        return [decode(code, k) for code in codes]
+    lanes = array('Q', codes)
+    n = len(lanes)
+    aligned = int.from_bytes(lanes.tobytes(), sys.byteorder) << 64 - 2*k
+    lanes = array('Q')
+    lanes.frombytes(aligned.to_bytes(8*n, sys.byteorder))
+    if not _BIG_ENDIAN:
+        lanes.byteswap()
+    packed = lanes.tobytes()
+    spelled = bytearray(4*len(packed))
+    for p, table in enumerate(_BYTE_BASES):
+        spelled[p::4] = packed.translate(table)
+    text = spelled.decode('ascii')
+    return [text[i:i+k] for i in range(0, len(text), _LANE_BASES)]
+
+def _spectrum(text: str, k: int) -> tuple[list[int], array]:
+    counts = Counter(kmer_codes(text, k))
+    ordered = sorted(counts)
+    return ordered, array('Q', map(counts.__getitem__, ordered))
+
+def kmer_spectrum(text: str, k: int, counts_only: bool = False) -> list[tuple[str, int]] | array:
+    """Return the distinct k-mers of a DNA string in lexicographic order with their counts.
+
+    K-mers are counted and sorted as 2-bit codes; since A<C<G<T matches the
+    code order this is the order of kmer_composition. With counts_only, return
+    just the counts (in the same order) without building any k-mer string.
+    K-mers overlapping bases other than ACGT are skipped.
+    """
+    ordered, counts = _spectrum(text, k)
+    if counts_only:
+        return counts
+    return list(zip(decode_all(ordered, k), counts))
+
+def iter_composition(text: str, k: int) -> Iterator[str]:
+    """Yield every k-mer of a DNA string, repeats included, in lexicographic order.
+
+    Only the distinct k-mers are held in memory, each once.
+    """
+    ordered, counts = _spectrum(text, k)
+    return chain.from_iterable(map(repeat, decode_all(ordered, k), counts))
@@ -0,0 +1,145 @@
+import resource
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar('T')
+
+_PAGE_SIZE = resource.getpagesize()
+_DONE = object()
+
+def current_rss() -> int:
+    """Return the resident set size of this process in bytes.
+
+    Reads /proc/self/statm where available and otherwise falls back to the
+    peak RSS reported by getrusage.
+    """
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+class Metrics:
+    """Collects phase timings, counters and RSS samples from an assembly run.
+
+    Phases nest: a phase started inside another is recorded under the path
+    "outer;inner", so `folded()` yields the collapsed-stack format read by
+    flame graph tools. Counters are added to; gauges keep the largest value
+    reported. If a callback is given it is called as callback(event, name,
+    value) for every finished phase ("phase", seconds), counter update
+    ("count", total), gauge update ("gauge", value) and RSS sample ("rss", bytes).
+    """
+    enabled = True
+
+    def __init__(self, callback: Callable[[str, str, float], None] | None = None, rss: bool = True) -> None:
+        self.callback = callback
+        self.sample_rss = rss
+        self.timings: dict[str, float] = {}
+        self.calls = Counter()
+        self.counters = Counter()
+        self.gauges: dict[str, int] = {}
+        self.rss: list[tuple[str, int]] = []
+        self._stack: list[str] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as a phase nested under any phase already running."""
+        self._stack.append(name)
+        path = ';'.join(self._stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._stack.pop()
+            self.timings[path] = self.timings.get(path, 0.0) + seconds
+            self.calls[path] += 1
+            if self.callback is not None:
+                self.callback('phase', path, seconds)
+            if self.sample_rss:
+                self.sample(path)
+
+    def iterate(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from items, timing every wait for the next item as the phase name."""
+        it = iter(items)
+        while True:
+            with self.phase(name):
+                item = next(it, _DONE)
+            if item is _DONE:
+                return
+            yield item
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add n to a counter."""
+        self.counters[name] += n
+        if self.callback is not None:
+            self.callback('count', name, self.counters[name])
+
+    def gauge(self, name: str, value: int) -> None:
+        """Record a value, keeping the largest one seen."""
+        if value > self.gauges.get(name, value - 1):
+            self.gauges[name] = value
+            if self.callback is not None:
+                self.callback('gauge', name, value)
+
+    def sample(self, label: str = '') -> int:
+        """Record the current RSS under a label and return it."""
+        rss = current_rss()
+        self.rss.append((label, rss))
+        if self.callback is not None:
+            self.callback('rss', label, rss)
+        return rss
+
+    def self_times(self) -> dict[str, float]:
+        """Return the time spent in each phase excluding the phases nested inside it."""
+        exclusive = dict(self.timings)
+        for path, seconds in self.timings.items():
+            parent = path.rpartition(';')[0]
+            if parent in exclusive:
+                exclusive[parent] -= seconds
+        return exclusive
+
+    def folded(self, unit: float = 1e-6) -> str:
+        """Return one "outer;inner count" line per phase, counting self time in units (microseconds)."""
+        return ''.join(f'{path} {max(0, round(seconds / unit))}\n'
+                       for path, seconds in sorted(self.self_times().items()))
+
+    def summary(self) -> dict:
+        """Return everything collected as a JSON-ready dict."""
+        return {
+            'phases': {path: {'seconds': seconds, 'calls': self.calls[path]}
+                       for path, seconds in self.timings.items()},
+            'counters': dict(self.counters),
+            'gauges': dict(self.gauges),
+            'peak_rss': max((rss for _, rss in self.rss), default=0),
+        }
+
+class NullMetrics:
+    """Stand-in for Metrics that records nothing.
+
+    Every method is a no-op and `phase` hands out one shared null context, so
+    instrumented code pays a method call per phase and nothing per k-mer.
+    """
+    enabled = False
+    _phase = nullcontext()
+
+    def phase(self, name: str) -> nullcontext:
+        return self._phase
+
+    def iterate(self, name: str, items: Iterable[T]) -> Iterable[T]:
+        return items
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def gauge(self, name: str, value: int) -> None:
+        pass
+
+    def sample(self, label: str = '') -> int:
+        return 0
+
+NULL_METRICS = NullMetrics()
@@ -1,14 +1,99 @@
+from array import array
+from bisect import bisect_right
+from typing import Iterator
+
+from csr import CSRGraph
+from kmers import label_store
 from deBruijn import *
 
-def maximal_nonbranching_paths(graph):
-    paths = []
-    for node in graph.nodes:
-        if not node.is_balanced():
-            if node.outgoing > 0:
-                for child in graph[node]:
-                    nonbranching_path = [node]
-                    while child.is_balanced():
-                        nonbranching_path.append(node)
-                        child = graph[child]
-                    paths.append(nonbranching_path)
-    return paths
+def _as_csr(graph: DeBruijinGraph | CSRGraph) -> CSRGraph:
+    return graph.csr() if isinstance(graph, DeBruijinGraph) else graph
+
+def nonbranching_walks(graph: CSRGraph) -> Iterator[tuple[list[int], list[int]]]:
+    """Yield the nodes and edges of every maximal non-branching path in O(V+E).
+
+    Paths start at nodes that are not 1-in-1-out; edges left over afterwards
+    belong to isolated cycles, which are yielded starting and ending at the same
+    node.
+    """
+    offsets, targets = graph.offsets, graph.targets
+    indegree = graph.in_degrees()
+    used = bytearray(len(targets))
+
+    def one_in_one_out(node: int) -> bool:
+        return indegree[node] == 1 and offsets[node+1] - offsets[node] == 1
+
+    for node in range(graph.node_count()):
+        if one_in_one_out(node):
+            continue
+        for edge in range(offsets[node], offsets[node+1]):
+            nodes, edges = [node], [edge]
+            used[edge] = 1
+            child = targets[edge]
+            while one_in_one_out(child):
+                nodes.append(child)
+                edge = offsets[child]
+                used[edge] = 1
+                edges.append(edge)
+                child = targets[edge]
+            nodes.append(child)
+            yield nodes, edges
+
+    first = used.find(0)
+    while first != -1:
+        edge = first
+        start = bisect_right(offsets, edge) - 1
+        nodes, edges = [start], []
+        child = start
+        while True:
+            used[edge] = 1
+            edges.append(edge)
+            child = targets[edge]
+            nodes.append(child)
+            if child == start:
+                break
+            edge = offsets[child]
+        yield nodes, edges
+        # every edge before first is used; the cycle may have skipped some after it
+        first = used.find(0, first)
+
+def maximal_nonbranching_paths(graph: DeBruijinGraph | CSRGraph) -> list[list[str]]:
+    """Return every maximal non-branching path, including isolated cycles, as node labels."""
+    graph = _as_csr(graph)
+    return [list(map(graph.label, nodes)) for nodes, _ in nonbranching_walks(graph)]
+
+def contigs(graph: DeBruijinGraph | CSRGraph) -> list[str]:
+    """Return the strings spelled by every maximal non-branching path."""
+    graph = _as_csr(graph)
+    return [graph.spell(nodes, edges) for nodes, edges in nonbranching_walks(graph)]
+
+def compact(graph: DeBruijinGraph | CSRGraph) -> CSRGraph:
+    """Collapse every maximal non-branching path into a single unitig edge.
+
+    The compacted graph keeps only junction nodes (plus one node per isolated
+    cycle); each edge carries its unitig string in `edge_labels`, so Eulerian
+    walks over it spell the same strings as over the original graph.
+    """
+    graph = _as_csr(graph)
+    ids, labels = {}, label_store(graph.label_length, graph.encoded)
+    walks = []
+    for nodes, edges in nonbranching_walks(graph):
+        ends = []
+        for node in (nodes[0], nodes[-1]):
+            if node not in ids:
+                ids[node] = len(labels)
+                labels.append(graph.labels[node])
+            ends.append(ids[node])
+        walks.append((ends[0], ends[1], graph.spell(nodes, edges)))
+
+    walks.sort(key=lambda walk: walk[0])
+    offsets = array('Q', [0]) * (len(labels) + 1)
+    for src, _, _ in walks:
+        offsets[src+1] += 1
+    for node in range(len(labels)):
+        offsets[node+1] += offsets[node]
+    targets = array('I' if len(labels) < 2**32 else 'Q', [dest for _, dest, _ in walks])
+    return CSRGraph(
+        offsets, targets, labels, label_length=graph.label_length,
+        encoded=graph.encoded, edge_labels=[unitig for _, _, unitig in walks],
+    )
@@ -1,5 +1,11 @@
-from deBruijn import Node, DeBruijinGraph
-import random
+from array import array
+from contextlib import closing
+from csr import CSRGraph
+from itertools import compress, count, repeat
+from metrics import NULL_METRICS, Metrics
+from kmers import ALPHABET, decode, encode, encode_all, is_dna, kmer_codes, kmer_mask, label_store
+from operator import and_, lshift, ne, or_, rshift
+from typing import Iterator, Sequence
 import sys
 
 """
@@ -9,6 +15,9 @@ As a hint to help you with formatting, your answer should begin "(AAT|CAT) (ATG|
 """
 def generate_read_pair_composition(text: str, k: int, d: int) -> list[str]:
     """Return a list of (k,d)-mers from a given text."""
+    if is_dna(text):
+        order = read_pair_composition(text, k, d)
+        return [f"({text[i:i+k]}|{text[i+k+d:i+2*k+d]})" for i in order]
     composition = []
     for i in range(len(text)-2*k-d+1):
         k1 = text[i:i+k]
@@ -17,6 +26,19 @@ def generate_read_pair_composition(text: str, k: int, d: int) -> list[str]:
     composition.sort()
     return [f"({kdmer[:k]}|{kdmer[k:]})" for kdmer in composition]
 
+def read_pair_composition(text: str, k: int, d: int) -> list[int]:
+    """Return the start of every (k,d)-mer of a DNA string, ordered lexicographically by (k,d)-mer.
+
+    Each (k,d)-mer is keyed by its two encoded halves packed into one integer,
+    so sorting the keys orders the read pairs like their concatenated strings.
+    """
+    codes = kmer_codes(text, k)
+    n = len(codes) - k - d
+    if n <= 0:
+        return []
+    keys = list(map(or_, map(lshift, codes[:n], repeat(2*k)), codes[k+d:]))
+    return sorted(range(n), key=keys.__getitem__)
+
 def generate_string_from_gapped_genome(kdmers: list[str], sep: str = '-') -> str:
     k = len(kdmers[0].split(sep)[0])
     prefix, suffix = '', ''
@@ -31,20 +53,82 @@ def generate_string_from_gapped_genome(kdmers: list[str], sep: str = '-') -> str
     return prefix + suffix[-(k+1):]
 
 def string_spelled_by_gapped_patterns(kdmers: list[str], k: int, d: int, sep: str = '-'):
-    kmers1, kmers2 = [], []
-    for kdmer in kdmers:
-        k1, k2 = kdmer.split(sep)
-        kmers1.append(k1)
-        kmers2.append(k2)
-    prefix = ''.join([k1[0] for k1 in kmers1[:-1]]) + kmers1[-1]
-    suffix = ''.join([k2[0] for k2 in kmers2[:-1]]) + kmers2[-1]
+    """Return the string spelled by consecutive (k,d)-mers, or False if they are inconsistent."""
+    firsts, seconds = encode_pairs(kdmers, sep)
+    if gapped_mismatch(firsts, seconds, k, d) is not None:
+        return False
+    return spell_gapped(firsts, seconds, k, d, check=False)
+
+# maps 2-bit codes stored one per byte back to bases
+_BASES = bytes.maketrans(bytes(range(4)), ALPHABET.encode())
+
+def encode_pairs(kdmers: Sequence[str], sep: str = '|') -> tuple[array | list, array | list]:
+    """Split (k,d)-mers like "ACG|TTA" into separate arrays of encoded first and second halves."""
+    halves = sep.join(kdmers).split(sep)
+    if len(halves) != 2 * len(kdmers):
+        raise ValueError(f'Every read pair must hold exactly one {sep!r}')
+    k = len(halves[0]) if halves else 0
+    return encode_all(halves[0::2], k), encode_all(halves[1::2], k)
+
+def _first_difference(a: bytes, b: bytes) -> int | None:
+    """Return the first index where two equally long byte strings differ."""
+    diff = int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')
+    if not diff:
+        return None
+    return len(a) - 1 - (diff.bit_length() - 1) // 8
+
+def _overlap_mismatch(codes: Sequence[int], k: int) -> int | None:
+    """Return the first position where consecutive k-mers of a path disagree on their overlap."""
+    mask = kmer_mask(k-1)
+    tails = list(map(and_, codes[:-1], repeat(mask)))
+    heads = list(map(rshift, codes[1:], repeat(2)))
+    for i in compress(count(), map(ne, tails, heads)):
+        base = (tails[i] ^ heads[i]).bit_length() - 1 >> 1
+        return i + k - 1 - base
+    return None
 
-    for i in range(k+d+1, len(prefix)):
-        if prefix[i] != suffix[i-k-d]:
-            print("There is no string spelled by the gapped patterns")
-            return False
+def _spell_path(codes: Sequence[int], k: int) -> str:
+    """Return the string spelled by a path of encoded k-mers, trusting their overlaps."""
+    firsts = bytes(map(rshift, codes[:-1], repeat(2*(k-1))))
+    return firsts.translate(_BASES).decode() + decode(codes[-1], k)
 
-    return prefix + suffix[-(k+d):]
+def gapped_mismatch(firsts: Sequence[int], seconds: Sequence[int], k: int, d: int) -> int | None:
+    """Return the first position of the spelled string that consecutive read pairs do not agree on.
+
+    Checks that the first halves and the second halves each form a path of
+    overlapping k-mers, and that both spell the same bases where they overlap
+    k+d positions apart. A base that no read pair covers also counts as a
+    mismatch. Returns None if the read pairs spell exactly one string.
+    """
+    if len(firsts) != len(seconds):
+        raise ValueError('Read pairs need as many first halves as second halves')
+    if not firsts:
+        return None
+    gap = k + d
+    found = []
+    if (pos := _overlap_mismatch(firsts, k)) is not None:
+        found.append(pos)
+    if (pos := _overlap_mismatch(seconds, k)) is not None:
+        found.append(pos + gap)
+    # every base of these spellings is read off some read pair, so any difference is a real conflict
+    prefix, suffix = _spell_path(firsts, k), _spell_path(seconds, k)
+    overlap = len(prefix) - gap
+    if overlap < 0:
+        # fewer than d+1 read pairs leave the bases between the halves unknown
+        found.append(len(prefix))
+        overlap = 0
+    if (pos := _first_difference(prefix[gap:].encode(), suffix[:overlap].encode())) is not None:
+        found.append(pos + gap)
+    return min(found, default=None)
+
+def spell_gapped(firsts: Sequence[int], seconds: Sequence[int], k: int, d: int, check: bool = True) -> str:
+    """Return the string spelled by consecutive read pairs given as encoded halves.
+
+    With check, raises ValueError naming the first inconsistent position.
+    """
+    if check and (pos := gapped_mismatch(firsts, seconds, k, d)) is not None:
+        raise ValueError(f'Read pairs disagree at position {pos} of the spelled string')
+    return _spell_path(firsts, k) + _spell_path(seconds, k)[-(k+d):]
 
 """
 Solve the String Reconstruction from Read-Pairs Problem.
@@ -58,43 +142,154 @@ def split_reads(read_pair: str, sep: str = '|') -> list[str]:
     k1, k2 = read_pair.split(sep)
     return k1, k2
 
+def pair_keys(reads: list[tuple[str, str]]) -> tuple[list[int], list[int]]:
+    """Return integer keys for the (prefix1, prefix2) and (suffix1, suffix2) of every read pair.
+
+    Each key packs both (k-1)-mer halves 2 bits per base, so it decodes as the
+    2(k-1)-mer prefix1+prefix2 (or suffix1+suffix2).
+    """
+    k = len(reads[0][0])
+    shift, mask = 2*(k-1), kmer_mask(k-1)
+    prefixes, suffixes = [], []
+    for k1, k2 in reads:
+        x, y = encode(k1), encode(k2)
+        prefixes.append((x >> 2) << shift | y >> 2)
+        suffixes.append((x & mask) << shift | y & mask)
+    return prefixes, suffixes
+
 def generate_dbg_from_paired_reads(paired_reads: list[str]) -> dict[tuple[str, str], list[tuple]]:
+    """Link every read pair to the read pairs whose prefixes match its suffixes."""
     reads = list(map(split_reads, paired_reads))
-    graph = {(read[0], read[1]): [] for read in reads}
-
-    for key in graph.keys():
-        s1, s2 = key[0][1:], key[1][1:]
-        for read in reads:
-            if key == read:
-                continue
-            p1, p2 = read[0][:-1], read[1][:-1]
-            if s1 == p1 and s2 == p2:
-                graph[key].append(read)
+    prefixes, suffixes = pair_keys(reads)
+    index = {}
+    for read, prefix in zip(reads, prefixes):
+        index.setdefault(prefix, []).append(read)
 
+    graph = {}
+    for read, suffix in zip(reads, suffixes):
+        if read not in graph:
+            graph[read] = [r for r in index.get(suffix, ()) if r != read]
     return graph
 
-def eulerian_path_from_paired_reads(paired_reads: list[str]):
-    g = generate_dbg_from_paired_reads(paired_reads)
-    # find a random starting node and a fixed ending node
-    for k, v in g.items():
-        if v == []:
-            end = k
-    start = random.choice(list(g.keys()))
-    # initialize stack and path
-    stack = [start]
-    path = [end]
-    graph = g.copy()
-    # walk path
-    while stack:
-        current = stack[-1]
-        if len(graph[current]) > 0:
-            child = graph[current].pop()
-            if child != end:
-                stack.append(child)
-        else:
-            n = stack.pop()
-            path = [n] + path
-    return path
+def paired_de_bruijn_graph(paired_reads: list[str], sep: str = '|', metrics: Metrics = NULL_METRICS) -> CSRGraph:
+    """Build the paired de Bruijn graph of a list of (k,d)-mers.
+
+    Nodes are (prefix1|prefix2) and (suffix1|suffix2) pairs of (k-1)-mers and
+    every read pair is an edge, so an Eulerian path spells the gapped genome.
+    """
+    with metrics.phase('split'):
+        reads = [split_reads(read, sep) for read in paired_reads]
+    with metrics.phase('pair_keys'):
+        prefixes, suffixes = pair_keys(reads)
+    k = len(reads[0][0])
+    ids, labels, adj = {}, label_store(2*(k-1)), {}
+    with metrics.phase('nodes'):
+        for prefix, suffix in zip(prefixes, suffixes):
+            for key in (prefix, suffix):
+                if key not in ids:
+                    ids[key] = len(labels)
+                    labels.append(key)
+            adj.setdefault(ids[prefix], []).append(ids[suffix])
+    metrics.count('read_pairs', len(reads))
+    metrics.gauge('nodes', len(labels))
+    with metrics.phase('csr'):
+        return CSRGraph.from_adjacency(adj, len(labels), labels=labels, label_length=2*(k-1), encoded=True)
+
+def gapped_reconstructions(paired_reads: list[str], k: int, d: int, sep: str = '|',
+                           max_steps: int | None = None, metrics: Metrics = NULL_METRICS) -> Iterator[str]:
+    """Yield every distinct string spelled by an Eulerian path of the paired de Bruijn graph.
+
+    The walk starts at the node with one more out-edge than in-edges (or at
+    every node, for a cycle) and extends one read pair at a time. Each step
+    checks the new base of the first-half string against the base k+d
+    positions earlier in the second-half string, so inconsistent branches are
+    abandoned as soon as they diverge. Raises RuntimeError once more than
+    max_steps edge choices have been tried.
+
+    The number of extension steps and backtracks and the deepest partial path
+    are reported to metrics when the search ends or the generator is closed.
+    """
+    with metrics.phase('paired_de_bruijn_graph'):
+        graph = paired_de_bruijn_graph(paired_reads, sep, metrics)
+    with metrics.phase('degree_balance'):
+        stats = graph.degree_stats()
+    metrics.gauge('edges', stats.edges)
+    metrics.gauge('semi_balanced', stats.semi_balanced)
+    if stats.unbalanced or stats.semi_balanced not in (0, 2):
+        raise ValueError('Read pairs do not form a paired de Bruijn graph with an Eulerian path')
+    offsets, targets, labels = graph.offsets, graph.targets, graph.labels
+    edges, gap, shift = stats.edges, k + d, 2*(k-1)
+    max_steps = max_steps or 100 * edges + 10_000
+    if stats.head is not None:
+        starts = [stats.head]
+    else:
+        starts = [node for node in range(graph.node_count()) if offsets[node+1] > offsets[node]]
+
+    steps = backtracks = deepest = 0
+    track = metrics.enabled
+    seen = set()
+    try:
+        for start in starts:
+            label = graph.label(start)
+            prefix, suffix = list(label[:k-1]), list(label[k-1:])
+            used = bytearray(edges)
+            path, nodes, cursors, tried = [], [start], [offsets[start]], [set()]
+            while cursors:
+                steps += 1
+                if steps > max_steps:
+                    raise RuntimeError(f'Gave up after trying {max_steps} read pair extensions')
+                node, i = nodes[-1], cursors[-1]
+                end = offsets[node+1]
+                while i < end and (used[i] or targets[i] in tried[-1]):
+                    i += 1
+                if i == end:
+                    if track and len(path) > deepest:
+                        deepest = len(path)
+                    backtracks += 1
+                    nodes.pop()
+                    cursors.pop()
+                    tried.pop()
+                    if path:
+                        used[path.pop()] = 0
+                        prefix.pop()
+                        suffix.pop()
+                    continue
+                cursors[-1] = i + 1
+                # parallel edges spell the same bases, so only one of them is tried
+                tried[-1].add(targets[i])
+                key = labels[targets[i]]
+                if len(prefix) >= gap and ALPHABET[(key >> shift) & 3] != suffix[len(prefix)-gap]:
+                    continue
+                used[i] = 1
+                path.append(i)
+                prefix.append(ALPHABET[(key >> shift) & 3])
+                suffix.append(ALPHABET[key & 3])
+                if len(path) < edges:
+                    nodes.append(targets[i])
+                    cursors.append(offsets[targets[i]])
+                    tried.append(set())
+                    continue
+                deepest = edges
+                text = ''.join(prefix) + ''.join(suffix[-gap:])
+                if text not in seen:
+                    seen.add(text)
+                    yield text
+                used[path.pop()] = 0
+                prefix.pop()
+                suffix.pop()
+    finally:
+        metrics.count('extensions', steps)
+        metrics.count('backtracks', backtracks)
+        metrics.gauge('stack_depth', deepest)
+
+def reconstruct_from_read_pairs(paired_reads: list[str], k: int, d: int, sep: str = '|',
+                                metrics: Metrics = NULL_METRICS) -> str:
+    """Return the first string consistent with all read pairs."""
+    with metrics.phase('reconstruct_from_read_pairs'):
+        with closing(gapped_reconstructions(paired_reads, k, d, sep, metrics=metrics)) as texts:
+            for text in texts:
+                return text
+    raise ValueError('There is no string spelled by the gapped patterns')
 
 def parse_file(path):
     with open(path, 'r') as fh:
@@ -105,14 +300,7 @@ def parse_file(path):
 
 def main() -> None:
     k, d, paired_reads = parse_file(sys.argv[1])
-    path = eulerian_path_from_paired_reads(paired_reads)
-
-    while len(path) != len(paired_reads):
-        path = eulerian_path_from_paired_reads(paired_reads)
-
-    reads = [f"{read[0]}-{read[1]}" for read in path]
-    seq = string_spelled_by_gapped_patterns(reads, k, d)
-    print(seq)
+    print(reconstruct_from_read_pairs(paired_reads, k, d))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,185 @@
+from array import array
+from itertools import accumulate, chain, compress, repeat
+
+from csr import CSRGraph, typecode
+from deBruijn import DeBruijinGraph
+from nonbranching_paths import contigs
+
+_KEEP = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+class GraphCleaner:
+    """Removes sequencing-error structure (tips and bubbles) from a CSR graph.
+
+    Edges are only marked as removed while cleaning, so repeated rounds cost
+    O(V+E) each; `result()` packs the surviving edges into a new CSRGraph.
+    Edge weights (see `DeBruijinGraph.csr(collapse=True)`) decide which branch
+    of a bubble is kept.
+    """
+    def __init__(self, graph: CSRGraph) -> None:
+        self.graph = graph
+        n, m = graph.node_count(), graph.edge_count()
+        self.removed = bytearray(m)
+        self.out_degree = array('q', graph.out_degrees())
+        self.in_degree = array('q', graph.in_degrees())
+        self.sources = array('I', chain.from_iterable(map(repeat, range(n), self.out_degree)))
+
+        # edges entering each node, grouped by target with a counting sort
+        self.in_offsets = array('Q', accumulate(self.in_degree, initial=0))
+        self.in_edges = array('Q', [0]) * m
+        fill = array('Q', self.in_offsets)
+        for edge, target in enumerate(graph.targets):
+            self.in_edges[fill[target]] = edge
+            fill[target] += 1
+
+    def live_out_edges(self, node: int) -> list[int]:
+        offsets, removed = self.graph.offsets, self.removed
+        return [e for e in range(offsets[node], offsets[node+1]) if not removed[e]]
+
+    def live_in_edges(self, node: int) -> list[int]:
+        in_edges, removed = self.in_edges, self.removed
+        return [in_edges[i] for i in range(self.in_offsets[node], self.in_offsets[node+1])
+                if not removed[in_edges[i]]]
+
+    def remove(self, edges: list[int]) -> None:
+        targets = self.graph.targets
+        for edge in edges:
+            if not self.removed[edge]:
+                self.removed[edge] = 1
+                self.out_degree[self.sources[edge]] -= 1
+                self.in_degree[targets[edge]] -= 1
+
+    def coverage(self, edges: list[int]) -> float:
+        """Return the mean weight of a run of edges."""
+        weights = self.graph.weights
+        if weights is None:
+            return 1.0
+        return sum(weights[e] for e in edges) / len(edges)
+
+    def clip_tips(self, max_length: int) -> int:
+        """Remove dead-end paths of at most max_length edges that join a junction.
+
+        Returns the number of tips clipped.
+        """
+        clipped = 0
+        for node in range(self.graph.node_count()):
+            if self.in_degree[node] == 0 and self.out_degree[node] == 1:
+                clipped += self._clip(node, max_length, forward=True)
+            elif self.out_degree[node] == 0 and self.in_degree[node] == 1:
+                clipped += self._clip(node, max_length, forward=False)
+        return clipped
+
+    def _clip(self, node: int, max_length: int, forward: bool) -> int:
+        targets, sources = self.graph.targets, self.sources
+        joining, leaving = (self.in_degree, self.out_degree) if forward else (self.out_degree, self.in_degree)
+        edges = []
+        while len(edges) < max_length:
+            (edge,) = self.live_out_edges(node) if forward else self.live_in_edges(node)
+            edges.append(edge)
+            node = targets[edge] if forward else sources[edge]
+            if joining[node] > 1:
+                self.remove(edges)
+                return 1
+            if joining[node] != 1 or leaving[node] != 1:
+                return 0
+        return 0
+
+    def pop_bubbles(self, max_depth: int) -> int:
+        """Remove weak branches that leave and rejoin the rest of the graph within max_depth edges.
+
+        A branch is a non-branching run of edges out of a node with several
+        out-edges. It is popped when a bounded breadth-first search finds
+        another route of at most max_depth edges to where the branch rejoins
+        and that route has at least the branch's mean coverage. Returns the
+        number of branches removed.
+        """
+        popped = 0
+        targets = self.graph.targets
+        for node in range(self.graph.node_count()):
+            if self.out_degree[node] < 2:
+                continue
+            branches = [path for edge in self.live_out_edges(node)
+                        if (path := self._follow(edge, max_depth)) is not None]
+            for path in sorted(branches, key=self.coverage):
+                end = targets[path[-1]]
+                if end == node or self.out_degree[node] < 2:
+                    continue
+                route = self._search(node, end, path[0], max_depth)
+                if route is not None and self.coverage(route) >= self.coverage(path):
+                    self.remove(path)
+                    popped += 1
+        return popped
+
+    def _search(self, start: int, end: int, excluded: int, max_depth: int) -> list[int] | None:
+        """Return the edges of a shortest route from start to end avoiding one out-edge of start."""
+        targets = self.graph.targets
+        parents = {start: None}
+        frontier = [start]
+        for _ in range(max_depth):
+            next_frontier = []
+            for node in frontier:
+                for edge in self.live_out_edges(node):
+                    child = targets[edge]
+                    if edge == excluded or child in parents:
+                        continue
+                    parents[child] = edge
+                    if child == end:
+                        route = []
+                        while (edge := parents[child]) is not None:
+                            route.append(edge)
+                            child = self.sources[edge]
+                        return route[::-1]
+                    next_frontier.append(child)
+            frontier = next_frontier
+        return None
+
+    def _follow(self, edge: int, max_depth: int) -> list[int] | None:
+        """Return the non-branching run of edges starting with edge, or None if it is too long."""
+        targets = self.graph.targets
+        path = [edge]
+        node = targets[edge]
+        while self.in_degree[node] == 1 and self.out_degree[node] == 1:
+            if len(path) >= max_depth:
+                return None
+            (edge,) = self.live_out_edges(node)
+            path.append(edge)
+            node = targets[edge]
+        return path
+
+    def result(self) -> CSRGraph:
+        """Return a new graph holding only the edges that were not removed."""
+        graph = self.graph
+        keep = self.removed.translate(_KEEP)
+        weights = graph.weights
+        return CSRGraph(
+            array('Q', accumulate(self.out_degree, initial=0)),
+            array(typecode(graph.targets), compress(graph.targets, keep)),
+            graph.labels, label_length=graph.label_length, encoded=graph.encoded,
+            weights=None if weights is None else array(typecode(weights), compress(weights, keep)),
+        )
+
+def simplify(graph: CSRGraph, max_tip_length: int | None = None, max_bubble_depth: int | None = None,
+             rounds: int = 10) -> CSRGraph:
+    """Alternate tip clipping and bubble popping until the graph stops changing.
+
+    Both limits default to twice the k-mer length.
+    """
+    k = graph.label_length + 1
+    max_tip_length = max_tip_length or 2 * k
+    max_bubble_depth = max_bubble_depth or 2 * k
+    cleaner = GraphCleaner(graph)
+    for _ in range(rounds):
+        if not cleaner.clip_tips(max_tip_length) + cleaner.pop_bubbles(max_bubble_depth):
+            break
+    return cleaner.result()
+
+def assemble(graph: DeBruijinGraph, **kwargs) -> list[str]:
+    """Return the genome if the graph has an Eulerian path, else contigs of the cleaned graph.
+
+    Keyword arguments are passed on to `simplify`.
+    """
+    if graph.is_eulerian():
+        try:
+            return [graph.csr().eulerian_genome()]
+        except ValueError:
+            pass
+    return contigs(simplify(graph.csr(collapse=True), **kwargs))
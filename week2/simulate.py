@@ -0,0 +1,61 @@
+import random
+
+from kmers import ALPHABET
+
+_OTHER_BASES = {base: ALPHABET.replace(base, '') for base in ALPHABET}
+
+def random_genome(length: int, repeat_fraction: float = 0.0, repeat_length: int = 200,
+                  seed: int | None = None) -> str:
+    """Return a random DNA string of the given length.
+
+    About repeat_fraction of the bases are exact copies of a single repeat of
+    repeat_length bases, scattered at random positions.
+    """
+    rng = random.Random(seed)
+    repeat = ''.join(rng.choices(ALPHABET, k=min(repeat_length, length)))
+    copies = int(length * repeat_fraction) // len(repeat) if repeat else 0
+    unique = length - copies * len(repeat)
+    cuts = sorted(rng.choices(range(unique + 1), k=copies))
+    pieces = []
+    for start, end in zip([0, *cuts], [*cuts, unique]):
+        pieces.append(''.join(rng.choices(ALPHABET, k=end - start)))
+    return repeat.join(pieces)
+
+def add_errors(read: str, error_rate: float, rng: random.Random) -> str:
+    """Return read with every base substituted by another base with probability error_rate."""
+    if not error_rate:
+        return read
+    bases = list(read)
+    for i, base in enumerate(bases):
+        if rng.random() < error_rate and base in _OTHER_BASES:
+            bases[i] = rng.choice(_OTHER_BASES[base])
+    return ''.join(bases)
+
+def simulate_reads(genome: str, read_length: int, coverage: float, error_rate: float = 0.0,
+                   seed: int | None = None) -> list[str]:
+    """Sample reads uniformly from a genome until the mean depth reaches coverage."""
+    rng = random.Random(seed)
+    read_length = min(read_length, len(genome))
+    count = round(coverage * len(genome) / read_length)
+    last = len(genome) - read_length
+    reads = []
+    for _ in range(count):
+        start = rng.randint(0, last)
+        reads.append(add_errors(genome[start:start+read_length], error_rate, rng))
+    return reads
+
+def simulate_read_pairs(genome: str, k: int, d: int, error_rate: float = 0.0, seed: int | None = None,
+                        sep: str = '|') -> list[str]:
+    """Return every (k,d)-mer of a genome once, shuffled, formatted as "first|second".
+
+    This is the perfect-coverage model of the read-pair reconstruction problem;
+    with error_rate, bases are substituted independently in both halves.
+    """
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(len(genome) - 2*k - d + 1):
+        first = add_errors(genome[i:i+k], error_rate, rng)
+        second = add_errors(genome[i+k+d:i+2*k+d], error_rate, rng)
+        pairs.append(f'{first}{sep}{second}')
+    rng.shuffle(pairs)
+    return pairs
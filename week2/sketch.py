@@ -0,0 +1,52 @@
+from array import array
+from typing import Hashable, Iterable
+
+MASK64 = (1 << 64) - 1
+SEEDS = (
+    0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+    0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9,
+)
+
+class CountMinSketch:
+    """Fixed-size approximate counter that never underestimates a count.
+
+    Memory is depth * width 16-bit cells regardless of how many distinct items
+    are added; counters saturate at 65535. Updates are conservative: only the
+    cells currently holding the minimum are incremented, which keeps the
+    overestimate from hash collisions small.
+    """
+    MAX_COUNT = 0xFFFF
+
+    def __init__(self, width: int = 1 << 22, depth: int = 4) -> None:
+        if not 1 <= depth <= len(SEEDS):
+            raise ValueError(f'depth must be between 1 and {len(SEEDS)}')
+        self.bits = max(1, (width - 1).bit_length())
+        self.width = 1 << self.bits
+        self.depth = depth
+        self.seeds = SEEDS[:depth]
+        self.tables = [array('H', [0]) * self.width for _ in range(depth)]
+
+    def __len__(self) -> int:
+        return self.width * self.depth
+
+    def _cells(self, item: Hashable) -> list[int]:
+        h = hash(item)
+        shift = 64 - self.bits
+        return [((h * seed) & MASK64) >> shift for seed in self.seeds]
+
+    def add(self, item: Hashable) -> None:
+        cells = self._cells(item)
+        count = min([table[cell] for table, cell in zip(self.tables, cells)])
+        if count == self.MAX_COUNT:
+            return
+        for table, cell in zip(self.tables, cells):
+            if table[cell] == count:
+                table[cell] = count + 1
+
+    def update(self, items: Iterable[Hashable]) -> None:
+        for item in items:
+            self.add(item)
+
+    def count(self, item: Hashable) -> int:
+        """Return an upper bound on the number of times item was added."""
+        return min([table[cell] for table, cell in zip(self.tables, self._cells(item))])
@@ -0,0 +1,75 @@
+from itertools import islice
+from typing import Iterable, Iterator, TextIO
+
+from kmers import ALPHABET
+
+def _checked_tails(first: str, path: Iterator) -> Iterator[str]:
+    prev = first
+    for item in path:
+        kmer = str(item)
+        if prev[1:] != kmer[:-1]:
+            raise ValueError('Neighboring kmers must have a matching prefix and suffix')
+        yield kmer[-1]
+        prev = kmer
+
+def iter_spelled(path: Iterable, graph=None, chunk_size: int = 1 << 16, check: bool = False) -> Iterator[str]:
+    """Yield the string spelled by a path in chunks of at most chunk_size characters.
+
+    The path may hold k-mer strings (or objects whose str() is the k-mer), or
+    node IDs of `graph` (a DeBruijinGraph or CSRGraph). Only one chunk is held
+    in memory at a time. With check, consecutive k-mers must overlap by k-1.
+    """
+    it = iter(path)
+    first = next(it, None)
+    if first is None:
+        return
+    if graph is not None:
+        labels = graph.labels
+        yield graph.label(first)
+        if graph.encoded:
+            tails = (ALPHABET[labels[node] & 3] for node in it)
+        else:
+            tails = (labels[node][-1] for node in it)
+    else:
+        first = str(first)
+        yield first
+        tails = _checked_tails(first, it) if check else (str(kmer)[-1] for kmer in it)
+    while chunk := ''.join(islice(tails, chunk_size)):
+        yield chunk
+
+def spell(path: Iterable, graph=None, check: bool = False) -> str:
+    """Return the string spelled by a path of k-mers or node IDs."""
+    return ''.join(iter_spelled(path, graph, check=check))
+
+def spell_into(path: Iterable, buffer: bytearray, graph=None, check: bool = False) -> int:
+    """Write the string spelled by a path into a preallocated buffer.
+
+    Returns the number of bytes written; raises ValueError if the buffer is too small.
+    """
+    view = memoryview(buffer)
+    size = 0
+    for chunk in iter_spelled(path, graph, check=check):
+        end = size + len(chunk)
+        if end > len(view):
+            raise ValueError(f'Buffer of {len(view)} bytes is too small for the spelled string')
+        view[size:end] = chunk.encode('ascii')
+        size = end
+    return size
+
+def write_fasta(fh: TextIO, name: str, chunks: Iterable[str], width: int = 60) -> int:
+    """Write one FASTA record whose sequence arrives in chunks, wrapping lines at width.
+
+    Returns the sequence length.
+    """
+    fh.write(f'>{name}\n')
+    carry, length = '', 0
+    for chunk in chunks:
+        length += len(chunk)
+        text = carry + chunk
+        full = len(text) - len(text) % width
+        for i in range(0, full, width):
+            fh.write(text[i:i+width] + '\n')
+        carry = text[full:]
+    if carry:
+        fh.write(carry + '\n')
+    return length
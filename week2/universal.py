@@ -0,0 +1,58 @@
+from typing import Iterator, Sequence
+
+def lyndon_words(size: int, n: int) -> Iterator[list[int]]:
+    """Yield the Lyndon words of length at most n over symbols 0..size-1 in lexicographic order.
+
+    Duval's algorithm: one list of at most n symbols is reused for every word,
+    so the caller must copy a word it wants to keep.
+    """
+    word = [-1]
+    while word:
+        word[-1] += 1
+        yield word
+        m = len(word)
+        while len(word) < n:
+            word.append(word[-m])
+        while word and word[-1] == size - 1:
+            word.pop()
+
+def de_bruijn_sequence(alphabet: Sequence[str], k: int, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Yield the lexicographically smallest de Bruijn sequence of order k in chunks.
+
+    The sequence has length len(alphabet)**k and contains every k-mer exactly
+    once when read cyclically. It is built by concatenating the Lyndon words
+    whose length divides k (Fredricksen-Kessler-Maiorana), so besides the
+    current chunk only O(k) memory is used.
+    """
+    if k < 1:
+        raise ValueError('k must be at least 1')
+    chunk = []
+    for word in lyndon_words(len(alphabet), k):
+        if k % len(word) == 0:
+            chunk.extend([alphabet[s] for s in word])
+            if len(chunk) >= chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+def iter_universal_string(k: int, alphabet: Sequence[str] = '01', circular: bool = True,
+                          chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Yield a k-universal string in chunks.
+
+    A circular k-universal string holds every k-mer once when read cyclically;
+    otherwise the first k-1 symbols are repeated at the end so that every k-mer
+    appears once in the linear string.
+    """
+    head = ''
+    for chunk in de_bruijn_sequence(alphabet, k, chunk_size):
+        if len(head) < k - 1:
+            head += chunk[:k-1-len(head)]
+        yield chunk
+    if not circular and k > 1:
+        # a one-symbol sequence is shorter than k-1, so wrap around it
+        yield (head * k)[:k-1]
+
+def k_universal_string(k: int, alphabet: Sequence[str] = '01', circular: bool = True) -> str:
+    """Return a k-universal string over alphabet."""
+    return ''.join(iter_universal_string(k, alphabet, circular))
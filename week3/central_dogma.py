@@ -1,35 +1,29 @@
 from constants import rna_genetic_code
+import sequence
+import translation
 
-RNA_GENETIC_CODE = rna_genetic_code()
+def __getattr__(name: str):
+    # the codon table is read on first use rather than at import
+    if name == 'RNA_GENETIC_CODE':
+        return rna_genetic_code()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 def complement(pattern: str) -> str:
     """Return the complement of a DNA string."""
-    COMPLEMENT_MAP = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G', 'N': 'N'}
-    return ''.join([COMPLEMENT_MAP[s] for s in pattern])
+    return sequence.complement(pattern)
 
 def reverse_complement(pattern: str) -> str:
     """Return the reverse complement of a DNA string."""
-    COMPLEMENT_MAP = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G', 'N': 'N'}
-    seq = ''
-    for s in pattern:
-        seq = COMPLEMENT_MAP[s] + seq
-    return seq
+    return sequence.reverse_complement(pattern)
 
 def transcribe(pattern: str) -> str:
     """Return an RNA string from a given DNA string."""
-    return pattern.replace('T', 'U')
+    return sequence.transcribe(pattern)
 
 def translate(pattern: str, genetic_code: dict[str, str]) -> str:
     """Return a peptide sequence from a given RNA string."""
-    if 'T' in pattern:
-        pattern = pattern.replace('T', 'U')
-    peptide = ''
-    for i in range(0, len(pattern), 3):
-        codon = pattern[i:i+3]
-        if genetic_code[codon] == "*":
-            return peptide
-        peptide += genetic_code[codon]
-    return peptide
+    peptide = translation.translate_frame(pattern, genetic_code)
+    return peptide.partition('*')[0]
 
 def generate_reading_frames(pattern: str) -> list[str]:
     frames = []
@@ -37,18 +31,19 @@ def generate_reading_frames(pattern: str) -> list[str]:
         frames.append(pattern[i:])
     return [f[:len(f)-(len(f)%3)] for f in frames]
 
-def find_coding_region(pattern: str, peptide: str, genetic_code: dict[str, str] = RNA_GENETIC_CODE) -> list[str]:
-    coding_regions = []
-    # convert DNA to RNA
+def find_coding_region(pattern: str, peptide: str, genetic_code: dict[str, str] | None = None) -> list[str]:
+    """Return every substring of a DNA string that encodes peptide on either strand, in order of position.
+
+    The standard RNA codon table is used unless genetic_code is given.
+    """
+    if genetic_code is None:
+        genetic_code = rna_genetic_code()
+    if translation.STOP in peptide:
+        # translation ends at a stop codon, so it never spells one
+        return []
     l = len(peptide) * 3
-    for i in range(len(pattern)-l+1):
-        seq = pattern[i:i+l]
-        rc = reverse_complement(seq)
-        seq_pep = translate(seq, genetic_code)
-        rc_pep = translate(rc, genetic_code)
-        if seq_pep == peptide or rc_pep == peptide:
-            coding_regions.append(seq)
-    return coding_regions
+    starts = sorted({hit.start for hit in translation.find_peptide(pattern, peptide, genetic_code)})
+    return [pattern[i:i+l] for i in starts]
 
 def main() -> None:
     pattern = 'ATGGCCATGGCCCCCAGAACTGAGATCAATAGTACCCGTATTAACGGGTGA'
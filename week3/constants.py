@@ -1,34 +1,64 @@
+import os
+from array import array
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
 
-RNA_CODON_TABLE = Path('/home/dagsdags/home/courses/ucsd-bioinformatics-specialization/course-2/datasets/tables/RNA_codon_table_1.txt')
-INTEGER_MASS_TABLE = Path('/home/dagsdags/home/courses/ucsd-bioinformatics-specialization/course-2/datasets/tables/integer_mass_table.txt')
+# tables bundled with the code; RNA_CODON_TABLE and INTEGER_MASS_TABLE in the
+# environment point to other files
+DATA_DIR = Path(__file__).parent / 'data'
+RNA_CODON_TABLE = Path(os.environ.get('RNA_CODON_TABLE', DATA_DIR / 'RNA_codon_table_1.txt'))
+INTEGER_MASS_TABLE = Path(os.environ.get('INTEGER_MASS_TABLE', DATA_DIR / 'integer_mass_table.txt'))
 
-def rna_genetic_code(path: Path = RNA_CODON_TABLE):
-    RGC = {}
+@lru_cache
+def _read_table(path: Path) -> tuple[tuple[str, ...], ...]:
     with open(path, 'r') as fh:
-        for line in fh:
-            res = line.rstrip().split()
-            if len(res) == 1:
-                RGC[res[0]] = "*"
-            else:
-                RGC[res[0]] = res[1]
-    return RGC
-
-def integer_mass_table(path: Path = INTEGER_MASS_TABLE):
-    IMT = {}
-    with open(path, 'r') as fh:
-        for line in fh:
-            k, v = line.rstrip().split()
-            IMT[k] = int(v)
-    fh.close()
-    return IMT
-
-def reversed_integer_mass_table(path: Path = INTEGER_MASS_TABLE):
-    IMT = {}
-    with open(path, 'r') as fh:
-        for line in fh:
-            v, k = line.rstrip().split()
-            IMT[int(k)] = v
-    fh.close()
-    return IMT
+        return tuple(tuple(line.split()) for line in fh if line.strip())
+
+def rna_genetic_code(path: Path | None = None) -> Mapping[str, str]:
+    """Return the RNA codon table as a read-only codon -> amino acid mapping; stop codons map to *.
+
+    Each file is parsed once; later calls return the same mapping.
+    """
+    return _rna_genetic_code(Path(path or RNA_CODON_TABLE))
+
+@lru_cache
+def _rna_genetic_code(path: Path) -> Mapping[str, str]:
+    return MappingProxyType({row[0]: row[1] if len(row) > 1 else '*' for row in _read_table(path)})
+
+def integer_mass_table(path: Path | None = None) -> Mapping[str, int]:
+    """Return a read-only amino acid -> integer mass mapping, parsed once per file."""
+    return _integer_mass_table(Path(path or INTEGER_MASS_TABLE))
+
+@lru_cache
+def _integer_mass_table(path: Path) -> Mapping[str, int]:
+    return MappingProxyType({aa: int(mass) for aa, mass in _read_table(path)})
+
+def reversed_integer_mass_table(path: Path | None = None) -> Mapping[int, str]:
+    """Return a read-only integer mass -> amino acid mapping.
+
+    Where amino acids share a mass (I/L, K/Q) the one listed last wins.
+    """
+    return _reversed_integer_mass_table(Path(path or INTEGER_MASS_TABLE))
+
+@lru_cache
+def _reversed_integer_mass_table(path: Path) -> Mapping[int, str]:
+    return MappingProxyType({mass: aa for aa, mass in _integer_mass_table(path).items()})
+
+@lru_cache
+def mass_array(path: Path | None = None) -> memoryview:
+    """Return the integer masses as a read-only view indexed by the ASCII code of each amino acid.
+
+    Letters without a mass hold 0, so sum(map(masses.__getitem__, peptide.encode()))
+    weighs a peptide without any dict lookups.
+    """
+    masses = array('L', [0]) * 256
+    for aa, mass in integer_mass_table(path).items():
+        masses[ord(aa)] = mass
+    return memoryview(masses).toreadonly()
 
+@lru_cache
+def amino_acid_masses(path: Path | None = None) -> tuple[int, ...]:
+    """Return the distinct amino acid masses in increasing order."""
+    return tuple(sorted(set(integer_mass_table(path).values())))
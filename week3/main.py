@@ -1,4 +1,5 @@
 from constants import integer_mass_table, reversed_integer_mass_table
+import spectra
 
 def get_subpeptides(peptide: str) -> list[str]:
     l = len(peptide)
@@ -10,19 +11,11 @@ def get_subpeptides(peptide: str) -> list[str]:
     return sorted(subpeptides, key=lambda x: len(x))
 
 def theoretical_spectrum(peptide: str) -> list[int]:
-    tspectrum = [0]
-    IMT = integer_mass_table()
-    subpeptides = get_subpeptides(peptide)
-    for peptide in subpeptides:
-        mass =  0
-        for aa in peptide:
-            mass += IMT[aa]
-        tspectrum.append(mass)
-    return sorted(tspectrum)
+    """Return the cyclic spectrum of a peptide."""
+    return spectra.cyclic_spectrum(peptide)
 
 def extend_peptide(peptide):
-    IMT = integer_mass_table()
-    return [peptide + aa for aa in IMT.keys()]
+    return [peptide + aa for aa in integer_mass_table()]
 
 def compute_mass(peptide: str) -> int:
     IMT = integer_mass_table()
@@ -38,7 +31,6 @@ def is_consistent(subspectrum: list[int], spectrum: list[int]):
     return True
 
 
-from itertools import accumulate
 def cyclopeptide_sequencing(spectrum: list[int]) -> list[str]:
     mass_list = [
         57, 71, 87, 97, 99, 101, 103, 113, 114, 115,
@@ -61,19 +53,8 @@ def cyclopeptide_sequencing(spectrum: list[int]) -> list[str]:
     return final
 
 def cyclic_spectrum(peptide: list) -> list:
-    prefix = [0] + list(accumulate(peptide))
-    cyclic = [0]
-    for (i, n) in enumerate(prefix[:-1]):
-        for (j, m) in enumerate(prefix[i+1:], start=i+1):
-            cyclic.append(m-n)
-            if i > 0 and j < len(peptide):
-                cyclic.append(prefix[-1] - (prefix[j] - prefix[i]))
-    return sorted(cyclic)
-
-spectrum = '0 113 128 186 241 299 314 427'.split(' ')
-spectrum = list(map(int, spectrum))
-
-print(cyclopeptide_sequencing(spectrum))
+    """Return the cyclic spectrum of a peptide given as a list of masses."""
+    return spectra.cyclic_spectrum(peptide)
 
 Alphabet = {57: 'G', 71: 'A', 87: 'S', 97: 'P',
             99: 'V', 101: 'T', 103: 'C', 113:'I/L',
@@ -91,4 +72,10 @@ def CountingMass(Mass, masslist):
     masslist[Mass] = n
     return n, masslist
 
+def main() -> None:
+    spectrum = '0 113 128 186 241 299 314 427'.split(' ')
+    spectrum = list(map(int, spectrum))
+    print(cyclopeptide_sequencing(spectrum))
 
+if __name__ == '__main__':
+    main()
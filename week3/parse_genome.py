@@ -1,16 +1,179 @@
+import mmap
+import os
 import sys
-from central_dogma import reverse_complement, translate, find_coding_region
+from pathlib import Path
+from typing import Iterator, NamedTuple
 
-def parse_genome(path):
-    genome = ''
-    with open(path, 'r') as fh:
+from constants import rna_genetic_code
+from translation import Hit, find_peptide
+
+class FaiEntry(NamedTuple):
+    """One line of a samtools-style .fai index."""
+    name: str
+    length: int
+    offset: int
+    line_bases: int
+    line_width: int
+
+def build_index(path: str | Path) -> list[FaiEntry]:
+    """Scan a FASTA file and return the position and line layout of every record.
+
+    A file without a header line is indexed as a single record named after
+    the file. Every line of a record but the last must be equally long.
+    """
+    entries = []
+    name, offset, length, line_bases, line_width, short = None, 0, 0, 0, 0, False
+    pos = 0
+
+    def finish() -> None:
+        if name is not None:
+            entries.append(FaiEntry(name, length, offset, line_bases, line_width))
+
+    with open(path, 'rb') as fh:
         for line in fh:
-            genome += line.rstrip()
-    fh.close()
-    return genome
+            size = len(line)
+            if line.startswith(b'>'):
+                finish()
+                name = line[1:].split(None, 1)[0].decode() if line[1:].strip() else ''
+                offset, length, line_bases, line_width, short = pos + size, 0, 0, 0, False
+            else:
+                if name is None:
+                    name, offset = Path(path).stem, pos
+                bases = len(line.rstrip(b'\r\n'))
+                if bases:
+                    if short or line_bases and (bases > line_bases or (bases == line_bases and size != line_width)):
+                        raise ValueError(f'{path}: record {name!r} has lines of different lengths')
+                    if not line_bases:
+                        line_bases, line_width = bases, size
+                    short = bases < line_bases
+                    length += bases
+                elif line_bases:
+                    # a blank line ends the regular layout, like a short line
+                    short = True
+                else:
+                    offset = pos + size
+            pos += size
+    finish()
+    return entries
+
+def write_index(path: str | Path, entries: list[FaiEntry]) -> None:
+    with open(path, 'w') as fh:
+        for entry in entries:
+            fh.write('\t'.join(map(str, entry)) + '\n')
+
+def read_index(path: str | Path) -> list[FaiEntry]:
+    with open(path) as fh:
+        return [FaiEntry(name, *map(int, rest))
+                for name, *rest in (line.rstrip('\n').split('\t') for line in fh if line.strip())]
+
+def load_index(path: str | Path) -> list[FaiEntry]:
+    """Return the index of a FASTA file, reusing path.fai unless it is older than the file.
+
+    A new index is written next to the file when possible.
+    """
+    fai = Path(f'{path}.fai')
+    try:
+        if fai.stat().st_mtime >= os.stat(path).st_mtime:
+            return read_index(fai)
+    except (OSError, ValueError):
+        pass
+    entries = build_index(path)
+    try:
+        write_index(fai, entries)
+    except OSError:
+        pass
+    return entries
+
+class IndexedFasta:
+    """Random access to the records of a memory-mapped FASTA file.
+
+    Only the bytes of a requested region are read from disk; regions come back
+    with the line breaks removed.
+    """
+    def __init__(self, path: str | Path) -> None:
+        self.path = path
+        self.entries = {entry.name: entry for entry in load_index(path)}
+        with open(path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(fh.fileno()).st_size else b''
+
+    def __enter__(self) -> 'IndexedFasta':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.entries)
+
+    def length(self, name: str | None = None) -> int:
+        return self._entry(name).length
+
+    def _entry(self, name: str | None) -> FaiEntry:
+        if name is None:
+            return next(iter(self.entries.values()))
+        return self.entries[name]
+
+    def _offset(self, entry: FaiEntry, pos: int) -> int:
+        return entry.offset + pos // entry.line_bases * entry.line_width + pos % entry.line_bases
+
+    def view(self, name: str | None = None, start: int = 0, end: int | None = None) -> memoryview:
+        """Return a zero-copy view of the raw file bytes holding bases start..end-1.
+
+        The view includes any line breaks inside the region.
+        """
+        entry = self._entry(name)
+        end = entry.length if end is None else min(end, entry.length)
+        if start >= end:
+            return memoryview(b'')
+        return memoryview(self._map)[self._offset(entry, start):self._offset(entry, end - 1) + 1]
+
+    def fetch_bytes(self, name: str | None = None, start: int = 0, end: int | None = None) -> bytes:
+        """Return bases start..end-1 of a record (the first by default) as bytes."""
+        with self.view(name, start, end) as region:
+            return region.tobytes().translate(None, b'\r\n')
+
+    def fetch(self, name: str | None = None, start: int = 0, end: int | None = None) -> str:
+        """Return bases start..end-1 of a record (the first by default)."""
+        return self.fetch_bytes(name, start, end).decode('ascii')
+
+    def iter_chunks(self, name: str | None = None, size: int = 1 << 20,
+                    overlap: int = 0) -> Iterator[tuple[int, str]]:
+        """Yield (start, bases) chunks of a record, each extending overlap bases into the next.
+
+        A match of up to overlap+1 bases therefore lies wholly inside at least one chunk.
+        """
+        length = self.length(name)
+        for start in range(0, length, size):
+            yield start, self.fetch(name, start, start + size + overlap)
+
+def iter_coding_regions(fasta: IndexedFasta, peptide: str, genetic_code: dict[str, str] | None = None,
+                        name: str | None = None, chunk_size: int = 1 << 21) -> Iterator[Hit]:
+    """Yield every stretch of a record that encodes peptide, streaming the genome in chunks.
+
+    Chunks overlap by one coding stretch, and a hit is reported by the chunk it
+    starts in, so none is missed or repeated. Coordinates are in the record.
+    """
+    if genetic_code is None:
+        genetic_code = rna_genetic_code()
+    size = len(peptide) * 3
+    chunk_size -= chunk_size % 3
+    for start, chunk in fasta.iter_chunks(name, chunk_size, overlap=size - 1):
+        for hit in find_peptide(chunk, peptide, genetic_code):
+            if hit.start < chunk_size:
+                yield Hit(start + hit.start, start + hit.end, hit.strand)
+
+def parse_genome(path):
+    """Return the bases of every record in a FASTA (or bare sequence) file, concatenated."""
+    with IndexedFasta(path) as fasta:
+        return ''.join(fasta.fetch(name) for name in fasta.names)
 
 if __name__ == '__main__':
     peptide = 'VKLFPWFNQY'
-    genome = parse_genome(sys.argv[1])
-    result = find_coding_region(genome, peptide)
-    print(result)
+    with IndexedFasta(sys.argv[1]) as fasta:
+        for hit in iter_coding_regions(fasta, peptide):
+            print(fasta.fetch(start=hit.start, end=hit.end))
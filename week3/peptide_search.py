@@ -0,0 +1,100 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, Iterator, NamedTuple
+
+from sequence import reverse_complement
+from translation import codon_span, six_frame_translation
+
+class PeptideHit(NamedTuple):
+    peptide: str
+    start: int
+    end: int
+    strand: str
+    dna: str
+
+class AhoCorasick:
+    """Automaton that finds every occurrence of many patterns in one pass over a text.
+
+    The trie and its failure links are folded into a complete transition table
+    over the characters of the patterns, so scanning costs one dict lookup per
+    character of text whatever the number of patterns.
+    """
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns = [p for p in dict.fromkeys(patterns) if p]
+        alphabet = sorted({c for p in self.patterns for c in p})
+        delta: list[dict[str, int]] = [{}]
+        out: list[list[int]] = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for c in pattern:
+                if c not in delta[state]:
+                    delta.append({})
+                    out.append([])
+                    delta[state][c] = len(delta) - 1
+                state = delta[state][c]
+            out[state].append(index)
+
+        # breadth-first, so every failure link points at a finished state
+        fail = [0] * len(delta)
+        queue = deque()
+        for c in alphabet:
+            child = delta[0].setdefault(c, 0)
+            if child:
+                queue.append(child)
+        while queue:
+            state = queue.popleft()
+            out[state].extend(out[fail[state]])
+            for c in alphabet:
+                child = delta[state].get(c)
+                if child is None:
+                    delta[state][c] = delta[fail[state]][c]
+                else:
+                    fail[child] = delta[fail[state]][c]
+                    queue.append(child)
+        self.delta = delta
+        self.out = [tuple(matches) for matches in out]
+        self.lengths = [len(p) for p in self.patterns]
+
+    def search(self, text: str) -> Iterator[tuple[int, int]]:
+        """Yield (start, pattern index) for every occurrence, in order of where it ends."""
+        delta, out, lengths = self.delta, self.out, self.lengths
+        state = 0
+        for i, c in enumerate(text):
+            state = delta[state].get(c, 0)
+            if out[state]:
+                for index in out[state]:
+                    yield i - lengths[index] + 1, index
+
+def search_peptides(genome: str, peptides: Iterable[str] | AhoCorasick,
+                    genetic_code: dict[str, str]) -> list[PeptideHit]:
+    """Return every stretch of genome that encodes one of the peptides, on either strand.
+
+    The six frames are translated once and scanned once by an Aho-Corasick
+    automaton over all peptides. Hits are ordered by position, then strand and
+    peptide; dna is the coding stretch as it reads on the given strand.
+    """
+    automaton = peptides if isinstance(peptides, AhoCorasick) else AhoCorasick(peptides)
+    patterns, n = automaton.patterns, len(genome)
+    hits = []
+    for frame in six_frame_translation(genome, genetic_code):
+        for i, index in automaton.search(frame.peptide):
+            peptide = patterns[index]
+            start, end = codon_span(frame, i, i + len(peptide), n)
+            dna = genome[start:end] if frame.strand == '+' else reverse_complement(genome[start:end])
+            hits.append(PeptideHit(peptide, start, end, frame.strand, dna))
+    hits.sort(key=lambda hit: (hit.start, hit.strand, hit.peptide))
+    return hits
+
+def search_genomes(genomes: Iterable[str], peptides: Iterable[str], genetic_code: dict[str, str],
+                   workers: int = 1) -> list[list[PeptideHit]]:
+    """Search many genomes for the same peptides, one genome per task on a process pool.
+
+    Returns the hits of each genome in input order.
+    """
+    automaton = AhoCorasick(peptides)
+    search = partial(search_peptides, peptides=automaton, genetic_code=genetic_code)
+    if workers <= 1:
+        return list(map(search, genomes))
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(search, genomes))
@@ -0,0 +1,98 @@
+from typing import Iterable, Iterator, TypeVar
+
+Seq = TypeVar('Seq', str, bytes, bytearray)
+
+CHUNK_SIZE = 1 << 20
+
+# IUPAC nucleotide codes and their complements, upper and lower case
+_IUPAC = 'ACGTUNRYKMSWBDHVacgtunrykmswbdhv'
+_IUPAC_COMPLEMENT = 'TGCAANYRMKSWVHDBtgcaanyrmkswvhdb'
+
+def _tables(src: str, dst: str) -> tuple[dict[int, int], bytes]:
+    return str.maketrans(src, dst), bytes.maketrans(src.encode(), dst.encode())
+
+_COMPLEMENT = _tables(_IUPAC, _IUPAC_COMPLEMENT)
+_RNA_COMPLEMENT = _tables(_IUPAC, _IUPAC_COMPLEMENT.replace('T', 'U').replace('t', 'u'))
+_TRANSCRIBE = _tables('Tt', 'Uu')
+_BACK_TRANSCRIBE = _tables('Uu', 'Tt')
+_UPPER = _tables(_IUPAC.lower(), _IUPAC.upper())
+_SOFT_MASK = _tables('acgtunrykmswbdhv', 'N' * 16)
+
+def _translate(seq: Seq, tables: tuple[dict[int, int], bytes]) -> Seq:
+    """Map every character of a str, bytes or bytearray through a pair of tables in one C pass."""
+    return seq.translate(tables[0] if isinstance(seq, str) else tables[1])
+
+def complement(seq: Seq, rna: bool = False) -> Seq:
+    """Return the complement of a DNA (or, with rna, RNA) sequence.
+
+    IUPAC ambiguity codes are complemented and case is kept; other characters
+    pass through unchanged.
+    """
+    return _translate(seq, _RNA_COMPLEMENT if rna else _COMPLEMENT)
+
+def reverse_complement(seq: Seq, rna: bool = False) -> Seq:
+    """Return the reverse complement of a sequence."""
+    return complement(seq, rna)[::-1]
+
+def transcribe(seq: Seq) -> Seq:
+    """Return the RNA transcript of a DNA sequence."""
+    return _translate(seq, _TRANSCRIBE)
+
+def back_transcribe(seq: Seq) -> Seq:
+    """Return the DNA sequence of an RNA transcript."""
+    return _translate(seq, _BACK_TRANSCRIBE)
+
+def upper(seq: Seq) -> Seq:
+    """Return a sequence with every nucleotide code in upper case."""
+    return _translate(seq, _UPPER)
+
+def hard_mask(seq: Seq) -> Seq:
+    """Return a sequence with soft-masked (lower case) bases replaced by N."""
+    return _translate(seq, _SOFT_MASK)
+
+def translate_into(buffer: bytearray | memoryview, table: bytes, chunk_size: int = CHUNK_SIZE) -> None:
+    """Map a writable buffer through a bytes translation table in place.
+
+    Works one chunk at a time, so the extra memory is chunk_size bytes however
+    large the buffer is.
+    """
+    view = memoryview(buffer)
+    for start in range(0, len(view), chunk_size):
+        end = start + chunk_size
+        view[start:end] = view[start:end].tobytes().translate(table)
+
+def complement_inplace(buffer: bytearray | memoryview, rna: bool = False, chunk_size: int = CHUNK_SIZE) -> None:
+    """Complement a writable buffer of bases in place."""
+    translate_into(buffer, (_RNA_COMPLEMENT if rna else _COMPLEMENT)[1], chunk_size)
+
+def reverse_complement_inplace(buffer: bytearray, rna: bool = False, chunk_size: int = CHUNK_SIZE) -> None:
+    """Reverse complement a bytearray in place."""
+    complement_inplace(buffer, rna, chunk_size)
+    buffer.reverse()
+
+def transcribe_inplace(buffer: bytearray | memoryview, chunk_size: int = CHUNK_SIZE) -> None:
+    """Transcribe a writable buffer of DNA in place."""
+    translate_into(buffer, _TRANSCRIBE[1], chunk_size)
+
+def iter_complement(chunks: Iterable[Seq], rna: bool = False) -> Iterator[Seq]:
+    """Complement a stream of chunks, e.g. the lines or blocks of a genome file."""
+    for chunk in chunks:
+        yield complement(chunk, rna)
+
+def iter_transcribed(chunks: Iterable[Seq]) -> Iterator[Seq]:
+    """Transcribe a stream of chunks."""
+    for chunk in chunks:
+        yield transcribe(chunk)
+
+def iter_reverse_complement(seq: str | bytes | bytearray | memoryview, rna: bool = False,
+                            chunk_size: int = CHUNK_SIZE) -> Iterator[str | bytes]:
+    """Yield the reverse complement of a sequence in chunks, starting from its end.
+
+    A memoryview (for instance over a memory-mapped genome) is read in place,
+    so only one chunk is ever copied.
+    """
+    for end in range(len(seq), 0, -chunk_size):
+        chunk = seq[max(0, end - chunk_size):end]
+        if isinstance(chunk, memoryview):
+            chunk = chunk.tobytes()
+        yield reverse_complement(chunk, rna)
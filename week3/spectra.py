@@ -0,0 +1,93 @@
+from array import array
+from collections import Counter
+from itertools import accumulate
+from operator import sub
+from typing import Iterable, Sequence
+
+from constants import integer_mass_table
+
+Peptide = str | Sequence[int]
+
+def peptide_masses(peptide: Peptide) -> list[int]:
+    """Return the integer mass of every amino acid of a peptide.
+
+    A peptide is either a string of amino acids or a sequence of masses,
+    which is returned as a list.
+    """
+    if isinstance(peptide, str):
+        return list(map(integer_mass_table().__getitem__, peptide))
+    return list(peptide)
+
+def prefix_masses(peptide: Peptide) -> list[int]:
+    """Return the masses of the prefixes of a peptide, starting with the empty one."""
+    return [0, *accumulate(peptide_masses(peptide))]
+
+def _linear(masses: list[int]) -> list[int]:
+    prefix = [0, *accumulate(masses)]
+    spectrum = [0]
+    # every subpeptide of one length is a difference of two prefix sums,
+    # so each length is a single map over two offset views of the prefixes
+    for length in range(1, len(masses) + 1):
+        spectrum.extend(map(sub, prefix[length:], prefix))
+    spectrum.sort()
+    return spectrum
+
+def _cyclic(masses: list[int]) -> list[int]:
+    n = len(masses)
+    if not n:
+        return [0]
+    # prefixes of the peptide read twice cover the subpeptides that wrap around
+    prefix = [0, *accumulate(masses * 2)]
+    spectrum = [0, prefix[n]]
+    for length in range(1, n):
+        spectrum.extend(map(sub, prefix[length:length+n], prefix))
+    spectrum.sort()
+    return spectrum
+
+def linear_spectrum(peptide: Peptide) -> list[int]:
+    """Return the sorted masses of every contiguous subpeptide of a linear peptide, and 0."""
+    return _linear(peptide_masses(peptide))
+
+def cyclic_spectrum(peptide: Peptide) -> list[int]:
+    """Return the sorted masses of every subpeptide of a cyclic peptide, the peptide itself and 0."""
+    return _cyclic(peptide_masses(peptide))
+
+def spectra(peptides: Iterable[Peptide], cyclic: bool = True) -> list[list[int]]:
+    """Return the spectrum of every peptide, in input order.
+
+    The mass table is looked up once and repeated peptides are computed once.
+    """
+    table = integer_mass_table()
+    build = _cyclic if cyclic else _linear
+    cache: dict[Peptide, list[int]] = {}
+    result = []
+    for peptide in peptides:
+        key = peptide if isinstance(peptide, str) else tuple(peptide)
+        if key not in cache:
+            masses = list(map(table.__getitem__, key)) if isinstance(key, str) else list(key)
+            cache[key] = build(masses)
+        result.append(cache[key])
+    return result
+
+def padded_spectra(peptides: Iterable[Peptide], cyclic: bool = True, fill: int = -1) -> list[array]:
+    """Return the spectra of many peptides as equally long integer arrays.
+
+    Shorter spectra are padded at the end with fill, so rows can be compared
+    or stacked position by position.
+    """
+    rows = spectra(peptides, cyclic)
+    width = max(map(len, rows), default=0)
+    return [array('l', row + [fill] * (width - len(row))) for row in rows]
+
+def mass_histograms(peptides: Iterable[Peptide], cyclic: bool = True) -> list[Counter]:
+    """Return the spectrum of every peptide as a mass -> multiplicity histogram."""
+    return [Counter(spectrum) for spectrum in spectra(peptides, cyclic)]
+
+def shared_masses(theoretical: Counter, experimental: Counter) -> int:
+    """Return the number of masses two spectra share, counting multiplicity."""
+    return sum((theoretical & experimental).values())
+
+def score_peptides(peptides: Iterable[Peptide], experimental: Iterable[int], cyclic: bool = True) -> list[int]:
+    """Return, for every peptide, how many masses of its spectrum the experimental spectrum explains."""
+    observed = Counter(experimental)
+    return [shared_masses(histogram, observed) for histogram in mass_histograms(peptides, cyclic)]
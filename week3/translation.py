@@ -0,0 +1,152 @@
+import re
+from array import array
+from typing import Iterator, NamedTuple
+
+from sequence import reverse_complement
+
+# bases as base-5 digits; 4 marks anything that is not a base
+_DIGITS = bytes(dict(zip(b'ACGTUacgtu', b'\x00\x01\x02\x03\x03' * 2)).get(i, 4) for i in range(256))
+_BASES = 'ACGU'
+UNKNOWN = 'X'
+STOP = '*'
+
+class Frame(NamedTuple):
+    strand: str
+    offset: int
+    peptide: str
+    stops: array | None
+
+def translation_table(genetic_code: dict[str, str]) -> bytes:
+    """Return a 256-byte table taking a codon index (see `codon_indices`) to its amino acid.
+
+    Codons are read as RNA or DNA. Codons holding anything but a base, and
+    indices above 124, translate to X.
+    """
+    table = bytearray(UNKNOWN.encode() * 256)
+    for codon, aa in genetic_code.items():
+        codon = codon.upper().replace('T', 'U')
+        if len(codon) == 3 and all(base in _BASES for base in codon):
+            a, b, c = map(_BASES.index, codon)
+            table[25*a + 5*b + c] = ord(aa)
+    return bytes(table)
+
+def codon_indices(seq: str | bytes) -> bytes:
+    """Return the base-5 index 25*a + 5*b + c of the codon starting at every position.
+
+    The bases are mapped to digits by one translate pass; the three shifted
+    digit strings are then read as big integers and combined with a single
+    multiply-add, which never carries because every index fits in a byte.
+    """
+    if isinstance(seq, str):
+        seq = seq.encode('ascii')
+    digits = seq.translate(_DIGITS)
+    n = len(digits) - 2
+    if n <= 0:
+        return b''
+    first, second, third = (int.from_bytes(digits[i:i+n], 'big') for i in range(3))
+    return (25*first + 5*second + third).to_bytes(n, 'big')
+
+def frame_codon_indices(seq: str | bytes, offset: int = 0) -> bytes:
+    """Return the codon indices of one reading frame, i.e. codon_indices(seq)[offset::3].
+
+    Only the codons of the frame are computed: the digits of the first,
+    second and third codon positions are sliced out and combined directly.
+    """
+    if isinstance(seq, str):
+        seq = seq.encode('ascii')
+    digits = seq.translate(_DIGITS)
+    n = (len(digits) - offset) // 3
+    if n <= 0:
+        return b''
+    first, second, third = (int.from_bytes(digits[offset+i:offset+3*n:3], 'big') for i in range(3))
+    return (25*first + 5*second + third).to_bytes(n, 'big')
+
+def translate_frame(seq: str | bytes, genetic_code: dict[str, str], offset: int = 0) -> str:
+    """Translate a single forward reading frame of a sequence through to its end."""
+    return frame_codon_indices(seq, offset).translate(translation_table(genetic_code)).decode('ascii')
+
+def _frames(indices: bytes, table: bytes) -> list[str]:
+    return [indices[offset::3].translate(table).decode('ascii') for offset in range(3)]
+
+def translate_frames(seq: str | bytes, genetic_code: dict[str, str]) -> list[str]:
+    """Translate the three forward reading frames of a sequence through to its end.
+
+    Stop codons appear as * and codons holding an unknown base as X.
+    """
+    return _frames(codon_indices(seq), translation_table(genetic_code))
+
+def stop_positions(peptide: str) -> array:
+    """Return the position of every stop codon (*) in a translated frame."""
+    return array('L', [m.start() for m in re.finditer(re.escape(STOP), peptide)])
+
+def six_frame_translation(seq: str | bytes, genetic_code: dict[str, str], stops: bool = False) -> list[Frame]:
+    """Translate all six reading frames of a sequence.
+
+    Frames come as +0, +1, +2 on the given strand followed by -0, -1, -2 on
+    the reverse complement; amino acid j of frame (strand, offset) is the
+    codon at offset + 3j of that strand. With stops, every frame also carries
+    the positions of its stop codons.
+    """
+    table = translation_table(genetic_code)
+    frames = []
+    for strand, text in (('+', seq), ('-', reverse_complement(seq))):
+        for offset, peptide in enumerate(_frames(codon_indices(text), table)):
+            frames.append(Frame(strand, offset, peptide, stop_positions(peptide) if stops else None))
+    return frames
+
+class Hit(NamedTuple):
+    start: int
+    end: int
+    strand: str
+
+def occurrences(text: str, pattern: str) -> Iterator[int]:
+    """Yield the start of every occurrence of pattern in text, overlapping ones included."""
+    i = text.find(pattern)
+    while i != -1:
+        yield i
+        i = text.find(pattern, i + 1)
+
+def find_peptide(seq: str | bytes, peptide: str, genetic_code: dict[str, str],
+                 frames: list[Frame] | None = None) -> list[Hit]:
+    """Return every stretch of seq that encodes peptide on either strand, ordered by position.
+
+    The six frames are translated once (or taken from frames, as returned by
+    `six_frame_translation`) and searched as strings, so the cost is one
+    translation plus a substring search per frame.
+    """
+    if frames is None:
+        frames = six_frame_translation(seq, genetic_code)
+    hits = []
+    for frame in frames:
+        for i in occurrences(frame.peptide, peptide):
+            hits.append(Hit(*codon_span(frame, i, i + len(peptide), len(seq)), frame.strand))
+    hits.sort()
+    return hits
+
+def codon_span(frame: Frame, start: int, end: int, length: int) -> tuple[int, int]:
+    """Return the [start, end) coordinates in the input sequence of amino acids start..end-1 of a frame.
+
+    length is the length of the input sequence; reverse-strand frames map back
+    to the forward coordinates of the codons.
+    """
+    begin, stop = frame.offset + 3*start, frame.offset + 3*end
+    if frame.strand == '+':
+        return begin, stop
+    return length - stop, length - begin
+
+def iter_orfs(seq: str | bytes, genetic_code: dict[str, str], min_length: int = 1,
+              start_codon: str = 'M') -> Iterator[tuple[Frame, int, int, str]]:
+    """Yield (frame, start, end, peptide) for every open reading frame in all six frames.
+
+    An ORF runs from a start amino acid to the next stop codon; start and end
+    are its [start, end) coordinates in seq including the stop
+    codon, and peptide excludes the stop. ORFs shorter than min_length amino
+    acids are skipped.
+    """
+    for frame in six_frame_translation(seq, genetic_code, stops=True):
+        peptide, previous = frame.peptide, 0
+        for stop in frame.stops:
+            begin = peptide.find(start_codon, previous, stop)
+            if begin != -1 and stop - begin >= min_length:
+                yield (frame, *codon_span(frame, begin, stop + 1, len(seq)), peptide[begin:stop])
+            previous = stop + 1